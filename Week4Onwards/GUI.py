@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import importlib.util
+import os
 import traceback
 import threading
 import webbrowser
@@ -11,6 +12,22 @@ from plotly.subplots import make_subplots
 import plotly.offline as pyo
 import numpy as np
 from src.backtester import MultiProductBacktester, Backtester
+from src.marketdata import ParsedDataCache
+from src.catalog import DataCatalog
+
+DATA_ROOTS = [os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')]
+
+
+def data_signature(product_data_paths):
+    """{product: {kind: (path, size, mtime)}} of the data files, to tell whether loaded data is still current"""
+    signature = {}
+    for product, files in product_data_paths.items():
+        signature[product] = {}
+        for kind, path in files.items():
+            stat = os.stat(path)
+            signature[product][kind] = (path, stat.st_size, stat.st_mtime_ns)
+    return signature
+
 
 class ModernMultiProductBacktesterGUI:
     def __init__(self, root):
@@ -24,7 +41,9 @@ class ModernMultiProductBacktesterGUI:
         self.product_data = {}  # {product_name: {'price_file': path, 'trades_file': path}}
         self.algo_file = ""
         self.backtester = None
+        self.loaded_signature = None  # data_signature() of the files self.backtester loaded
         self.is_multi_product = False
+        self.data_cache = ParsedDataCache()  # parsed CSVs reused across runs
         
         # Create main layout
         self.create_widgets()
@@ -131,7 +150,12 @@ class ModernMultiProductBacktesterGUI:
         self.remove_product_btn = ttk.Button(product_controls_frame, text="➖ Remove Product",
                                             command=self.remove_product, style='Dark.TButton',
                                             state='disabled')
-        self.remove_product_btn.pack(side='left')
+        self.remove_product_btn.pack(side='left', padx=(0, 10))
+
+        self.discover_btn = ttk.Button(product_controls_frame, text="🗂️ Discover Products",
+                                       command=self.discover_products, style='Dark.TButton',
+                                       state='disabled')
+        self.discover_btn.pack(side='left')
 
         # Products list frame with scrollbar
         self.products_list_frame = tk.Frame(self.products_frame, bg=self.colors['bg_primary'])
@@ -277,6 +301,7 @@ class ModernMultiProductBacktesterGUI:
         
         self.add_product_btn.config(state='disabled')
         self.remove_product_btn.config(state='disabled')
+        self.discover_btn.config(state='disabled')
         
         # Add default single product
         self.add_single_product()
@@ -291,6 +316,7 @@ class ModernMultiProductBacktesterGUI:
         
         self.add_product_btn.config(state='normal')
         self.remove_product_btn.config(state='normal')
+        self.discover_btn.config(state='normal')
         
         self.log_message("🔧 Switched to Multi-Product Mode", 'success')
 
@@ -411,6 +437,30 @@ class ModernMultiProductBacktesterGUI:
         self.refresh_products_display()
         self.log_message(f"✅ Product '{product_name}' added successfully", 'success')
 
+    def discover_products(self):
+        """Add every product found under the data folders, without file dialogs"""
+        if not self.is_multi_product:
+            return
+
+        try:
+            entries = DataCatalog(DATA_ROOTS).scan()
+        except Exception as e:
+            self.log_message(f"❌ Product discovery failed: {e}", 'error')
+            return
+
+        added = 0
+        for product, entry in entries.items():
+            if product in self.product_data:
+                continue
+            self.product_data[product] = {
+                'price_file': entry.prices.path,
+                'trades_file': entry.trades.path
+            }
+            added += 1
+
+        self.refresh_products_display()
+        self.log_message(f"🗂️ Discovered {len(entries)} products, added {added}", 'success')
+
     def remove_product(self):
         """Remove selected product"""
         if not self.is_multi_product:
@@ -508,18 +558,40 @@ class ModernMultiProductBacktesterGUI:
                 }
 
             # Initialize appropriate backtester
-            if self.is_multi_product or len(self.product_data) > 1:
-                self.backtester = MultiProductBacktester(product_data_paths, trader)
+            multi = self.is_multi_product or len(self.product_data) > 1
+            if multi:
+                expected_paths = product_data_paths
+            else:
+                data = list(self.product_data.values())[0]
+                expected_paths = {"PRODUCT": {"price_csv": data['price_file'], "trades_csv": data['trades_file']}}
+
+            signature = data_signature(expected_paths)
+            reusable = (self.backtester is not None and self.backtester.loaded
+                        and isinstance(self.backtester, Backtester) == (not multi)
+                        and self.loaded_signature == signature)
+            if reusable:
+                # Same files, unchanged since the last run: reuse the loaded data
+                self.log_message("♻️ Reusing data loaded by the previous run")
+            else:
+                if multi:
+                    self.backtester = MultiProductBacktester(product_data_paths, trader, self.data_cache)
+                else:
+                    # Single product - use backward compatible backtester
+                    self.backtester = Backtester(data['price_file'], data['trades_file'], trader, self.data_cache)
+                self.loaded_signature = signature
+
+            if multi:
                 self.log_message(f" Running multi-product backtest for {len(self.product_data)} products...")
             else:
-                # Single product - use backward compatible backtester
-                product_name = list(self.product_data.keys())[0]
-                data = self.product_data[product_name]
-                self.backtester = Backtester(data['price_file'], data['trades_file'], trader)
                 self.log_message(" Running single-product backtest...")
 
             # Run backtest
-            self.backtester.run()
+            self.backtester.run(trader)
+            cache_stats = self.data_cache.stats()
+            self.log_message(f"🗃️ Data cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+            match_stats = self.backtester.match_stats
+            self.log_message(f"⚡ Matching: {match_stats['fast_path']} of {match_stats['orders']} orders "
+                             f"could not cross and skipped the book")
 
             # Log results
             self.log_message("🎉 Backtest completed successfully!", 'success')
@@ -527,17 +599,17 @@ class ModernMultiProductBacktesterGUI:
             if isinstance(self.backtester, MultiProductBacktester) and len(self.backtester.products) > 1:
                 # Multi-product results
                 overall_pnl = (self.backtester.overall_pnl_history[-1] 
-                             if self.backtester.overall_pnl_history else 0)
+                             if len(self.backtester.overall_pnl_history) else 0)
                 self.log_message(f"💰 Overall Final PnL: {overall_pnl:.2f}")
                 
                 for product in self.backtester.products:
                     product_pnl = (self.backtester.total_pnl_histories[product][-1] 
-                                 if self.backtester.total_pnl_histories[product] else 0)
+                                 if len(self.backtester.total_pnl_histories[product]) else 0)
                     self.log_message(f" {product} PnL: {product_pnl:.2f}")
             else:
                 # Single product results
                 self.log_message(f" Final Position: {self.backtester.position}")
-                self.log_message(f"💰 Final PnL: {(self.backtester.total_pnl_histories['PRODUCT'][-1] if self.backtester.total_pnl_histories['PRODUCT'] else 0)}")
+                self.log_message(f"💰 Final PnL: {(self.backtester.total_pnl_histories['PRODUCT'][-1] if len(self.backtester.total_pnl_histories['PRODUCT']) else 0)}")
 
             # Enable visualization buttons
             self.interactive_btn.config(state='normal')
@@ -565,17 +637,17 @@ class ModernMultiProductBacktesterGUI:
         if isinstance(self.backtester, MultiProductBacktester) and len(self.backtester.products) > 1:
             # Multi-product stats
             overall_pnl = (self.backtester.overall_pnl_history[-1] 
-                         if self.backtester.overall_pnl_history else 0)
-            max_pnl = max(self.backtester.overall_pnl_history) if self.backtester.overall_pnl_history else 0
-            min_pnl = min(self.backtester.overall_pnl_history) if self.backtester.overall_pnl_history else 0
+                         if len(self.backtester.overall_pnl_history) else 0)
+            max_pnl = max(self.backtester.overall_pnl_history) if len(self.backtester.overall_pnl_history) else 0
+            min_pnl = min(self.backtester.overall_pnl_history) if len(self.backtester.overall_pnl_history) else 0
             
             stats_text = f"💰 Overall PnL: ${overall_pnl:,.2f} | 📦 Products: {len(self.backtester.products)} | 📈 Max: ${max_pnl:,.2f} | 📉 Min: ${min_pnl:,.2f}"
         else:
             # Single product stats
-            final_pnl = (self.backtester.total_pnl_histories['PRODUCT'][-1] if self.backtester.total_pnl_histories['PRODUCT'] else 0)
+            final_pnl = (self.backtester.total_pnl_histories['PRODUCT'][-1] if len(self.backtester.total_pnl_histories['PRODUCT']) else 0)
             final_position = self.backtester.position
-            max_pnl = max(self.backtester.realized_pnl_history) if self.backtester.realized_pnl_history else 0
-            min_pnl = min(self.backtester.realized_pnl_history) if self.backtester.realized_pnl_history else 0
+            max_pnl = max(self.backtester.realized_pnl_history) if len(self.backtester.realized_pnl_history) else 0
+            min_pnl = min(self.backtester.realized_pnl_history) if len(self.backtester.realized_pnl_history) else 0
             
             stats_text = f"💰 Final PnL: ${final_pnl:,.2f} |  Position: {final_position} | 📈 Max: ${max_pnl:,.2f} | 📉 Min: ${min_pnl:,.2f}"
 
@@ -883,10 +955,10 @@ class ModernMultiProductBacktesterGUI:
 
     def _generate_multi_product_summary(self):
         """Generate summary for multi-product backtest"""
-        overall_pnl = self.backtester.overall_pnl_history[-1] if self.backtester.overall_pnl_history else 0
-        overall_realized = self.backtester.overall_realized_pnl_history[-1] if self.backtester.overall_realized_pnl_history else 0
-        max_overall_pnl = max(self.backtester.overall_pnl_history) if self.backtester.overall_pnl_history else 0
-        min_overall_pnl = min(self.backtester.overall_pnl_history) if self.backtester.overall_pnl_history else 0
+        overall_pnl = self.backtester.overall_pnl_history[-1] if len(self.backtester.overall_pnl_history) else 0
+        overall_realized = self.backtester.overall_realized_pnl_history[-1] if len(self.backtester.overall_realized_pnl_history) else 0
+        max_overall_pnl = max(self.backtester.overall_pnl_history) if len(self.backtester.overall_pnl_history) else 0
+        min_overall_pnl = min(self.backtester.overall_pnl_history) if len(self.backtester.overall_pnl_history) else 0
         
         summary = f"""{'='*80}
  MULTI-PRODUCT BACKTESTING PERFORMANCE SUMMARY
@@ -906,13 +978,13 @@ class ModernMultiProductBacktesterGUI:
         for product in self.backtester.products:
             final_pos = self.backtester.positions[product]
             final_pnl = (self.backtester.total_pnl_histories[product][-1] 
-                        if self.backtester.total_pnl_histories[product] else 0)
+                        if len(self.backtester.total_pnl_histories[product]) else 0)
             final_realized = (self.backtester.realized_pnl_histories[product][-1] 
-                            if self.backtester.realized_pnl_histories[product] else 0)
+                            if len(self.backtester.realized_pnl_histories[product]) else 0)
             max_pnl = (max(self.backtester.total_pnl_histories[product]) 
-                      if self.backtester.total_pnl_histories[product] else 0)
+                      if len(self.backtester.total_pnl_histories[product]) else 0)
             min_pnl = (min(self.backtester.total_pnl_histories[product]) 
-                      if self.backtester.total_pnl_histories[product] else 0)
+                      if len(self.backtester.total_pnl_histories[product]) else 0)
             
             summary += f"""
 ├── {product}:
@@ -942,8 +1014,8 @@ class ModernMultiProductBacktesterGUI:
         """Generate summary for single product backtest"""
         final_pnl = self.backtester.pnl
         final_position = self.backtester.position
-        max_pnl = max(self.backtester.realized_pnl_history) if self.backtester.realized_pnl_history else 0
-        min_pnl = min(self.backtester.realized_pnl_history) if self.backtester.realized_pnl_history else 0
+        max_pnl = max(self.backtester.realized_pnl_history) if len(self.backtester.realized_pnl_history) else 0
+        min_pnl = min(self.backtester.realized_pnl_history) if len(self.backtester.realized_pnl_history) else 0
         
         # Calculate additional metrics
         positions = np.array(self.backtester.position_history)
@@ -0,0 +1,63 @@
+"""
+Compare CSV ingestion throughput for plain and compressed copies of a file.
+
+Usage (from Week4Onwards/):
+    python benchmarks/compressed_ingest.py [price_csv] [--repeat N] [--copies N]
+
+The source file is concatenated --copies times to get a realistically sized input,
+written as .csv, .csv.gz, .csv.xz and .csv.bz2 into a temporary directory and
+parsed with load_price_csv. MB/s is measured against the bytes on disk.
+"""
+import argparse
+import bz2
+import gzip
+import lzma
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.marketdata import load_price_csv  # noqa: E402
+
+WRITERS = {"": open, ".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+
+
+def write_inputs(source, copies, out_dir):
+    with open(source, "rb") as f:
+        header = f.readline()
+        body = f.read()
+    payload = header + body * copies
+
+    paths = {}
+    for suffix, opener in WRITERS.items():
+        path = os.path.join(out_dir, "prices.csv" + suffix)
+        with opener(path, "wb") as f:
+            f.write(payload)
+        paths[suffix or ".csv"] = path
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("price_csv", nargs="?", default="data/LUXRAY/prices_luxray.csv")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--copies", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        paths = write_inputs(args.price_csv, args.copies, out_dir)
+        print(f"{'format':<8}{'size MB':>10}{'rows':>10}{'best s':>10}{'rows/s':>14}{'MB/s':>10}")
+        for name, path in paths.items():
+            size = os.path.getsize(path)
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                rows = len(load_price_csv(path))
+                best = min(best, time.perf_counter() - start)
+            print(f"{name:<8}{size / 1e6:>10.2f}{rows:>10}{best:>10.3f}{rows / best:>14,.0f}{size / 1e6 / best:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
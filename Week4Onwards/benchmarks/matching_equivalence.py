@@ -0,0 +1,253 @@
+"""
+Check that the matching engine fills exactly like the original sort-per-order matcher.
+
+Usage (from Week4Onwards/):
+    python benchmarks/matching_equivalence.py [--data data] [--seed N] [--orders N]
+
+Every product under --data is replayed twice with the same randomised trader, once
+with MultiProductBacktester and once with ReferenceBacktester, which keeps the
+original matcher: sort the eligible levels for each order, then scan every print of
+the tick. The trader sends several orders per side per tick, priced from well inside
+the spread to several levels through it and sometimes repeated at the same price,
+so partial fills, exhausted levels, runs of repeated quotes and shared prints all occur.
+Every fill (product, quantity, price), the fill logs and the final positions and PnL
+must match. Exits with status 1 on the first difference. The reference keeps the
+engine's per-fill records (fill log rows and OrderResult fills), so the times
+reported, the time spent in _match_product_orders only, compare matching alone.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.accounting import SOURCE_BOOK, SOURCE_TAPE  # noqa: E402
+from src.backtester import MultiProductBacktester, Order, OrderResult  # noqa: E402
+from src.catalog import DataCatalog  # noqa: E402
+
+
+class ReferenceBacktester(MultiProductBacktester):
+    """MultiProductBacktester with the original matcher, keeping the engine's fill records"""
+
+    def _match_product_orders(self, product, results, trade_prices, trade_quantities, max_pos, timestamp):
+        self._match_one_by_one(product, results, trade_prices, trade_quantities, max_pos, timestamp)
+
+    def _record_fill(self, product, result, timestamp, quantity, price, source):
+        """The engine's bookkeeping for a fill, so both matchers do the same work per fill"""
+        self.fill_log.append(timestamp, self._product_ids[product], result.order_no, 1 if quantity > 0 else -1,
+                             price, abs(quantity), source)
+        result.fills.append((price, quantity))
+
+    def _match_one_by_one(self, product, results: List[OrderResult], trade_prices, trade_quantities, max_pos,
+                          timestamp):
+        """Sort the eligible levels for every order, then scan every print"""
+        orderbook = self.orderbooks[product]
+        position_tracker = self.position_trackers[product]
+        book = None  # (buy_orders, sell_orders) once liquidity has been consumed
+        
+        for result in results:
+            order = result.order
+            qty_to_fill = abs(order.quantity)
+            filled = 0
+
+            # Enforce position limits
+            current_position = self.positions[product]
+            if order.quantity > 0:
+                if max_pos:
+                    max_allowed = max_pos - current_position
+                else:
+                    max_allowed = self.POSITION_LIMIT[product] - current_position
+                if max_allowed <= 0:
+                    continue
+                qty_to_fill = min(qty_to_fill, max_allowed)
+            else:
+                if max_pos:
+                    max_allowed = current_position + max_pos
+                else:
+                    max_allowed = current_position + self.POSITION_LIMIT[product]
+                if max_allowed <= 0:
+                    continue
+                qty_to_fill = min(qty_to_fill, max_allowed)
+
+            if order.quantity > 0:
+                # Buy order matching sell orders
+                sell_prices = sorted(p for p in orderbook.sell_orders if p <= order.price)
+                for sp in sell_prices:
+                    avail = orderbook.sell_orders[sp]
+                    fill = min(qty_to_fill - filled, avail)
+                    if fill <= 0:
+                        continue
+
+                    # Update legacy tracking
+                    filled += fill
+                    self.positions[product] += fill
+                    self.pnls[product] -= fill * sp
+
+                    # Update enhanced tracking
+                    position_tracker.add_trade(fill, sp)
+                    self._record_fill(product, result, timestamp, fill, sp, SOURCE_BOOK)
+                    if book is None:
+                        book = orderbook.own_orders()
+                    book[1][sp] -= fill
+                    if book[1][sp] == 0:
+                        del book[1][sp]
+
+                    if filled == qty_to_fill:
+                        break
+
+                # Match market trades with price <= order price
+                for i, trade_price in enumerate(trade_prices):
+                    if trade_price <= order.price and filled < qty_to_fill and trade_quantities[i] > 0:
+                        fill = min(qty_to_fill - filled, trade_quantities[i])
+                        
+                        # Update legacy tracking
+                        filled += fill
+                        self.positions[product] += fill
+                        self.pnls[product] -= fill * trade_price
+
+                        # Update enhanced tracking
+                        position_tracker.add_trade(fill, trade_price)
+                        self._record_fill(product, result, timestamp, fill, trade_price, SOURCE_TAPE)
+                        trade_quantities[i] -= fill
+
+                        if filled == qty_to_fill:
+                            break
+
+            else:
+                # Sell order matching buy orders
+                buy_prices = sorted((p for p in orderbook.buy_orders if p >= order.price), reverse=True)
+                for bp in buy_prices:
+                    avail = orderbook.buy_orders[bp]
+                    fill = min(qty_to_fill - filled, avail)
+                    if fill <= 0:
+                        continue
+
+                    # Update legacy tracking
+                    filled += fill
+                    self.positions[product] -= fill
+                    self.pnls[product] += fill * bp
+
+                    # Update enhanced tracking
+                    position_tracker.add_trade(-fill, bp)
+                    self._record_fill(product, result, timestamp, -fill, bp, SOURCE_BOOK)
+                    if book is None:
+                        book = orderbook.own_orders()
+                    book[0][bp] -= fill
+                    if book[0][bp] == 0:
+                        del book[0][bp]
+
+                    if filled == qty_to_fill:
+                        break
+
+                # Match market trades with price >= order price
+                for i, trade_price in enumerate(trade_prices):
+                    if trade_price >= order.price and filled < qty_to_fill and trade_quantities[i] > 0:
+                        fill = min(qty_to_fill - filled, trade_quantities[i])
+                        
+                        # Update legacy tracking
+                        filled += fill
+                        self.positions[product] -= fill
+                        self.pnls[product] += fill * trade_price
+
+                        # Update enhanced tracking
+                        position_tracker.add_trade(-fill, trade_price)
+                        self._record_fill(product, result, timestamp, -fill, trade_price, SOURCE_TAPE)
+                        trade_quantities[i] -= fill
+
+                        if filled == qty_to_fill:
+                            break
+
+            result.filled = filled if order.quantity > 0 else -filled
+
+        if book is not None:
+            orderbook.own_orders()  # drop summaries computed before the fills
+
+
+class RandomTrader:
+    """Sends seeded random orders around the touch for every product with a two-sided book"""
+
+    def __init__(self, seed, orders_per_side):
+        self.rng = random.Random(seed)
+        self.orders_per_side = orders_per_side
+
+    def run(self, state):
+        orders = {}
+        for product, book in state.order_depth.items():
+            if book.best_bid is None or book.best_ask is None:
+                continue
+            product_orders = []
+            for _ in range(self.orders_per_side):
+                product_orders.append(Order(product, book.best_ask + self.rng.randint(-3, 4),
+                                            self.rng.randint(1, 25)))
+                product_orders.append(Order(product, book.best_bid - self.rng.randint(-3, 4),
+                                            -self.rng.randint(1, 25)))
+            self.rng.shuffle(product_orders)
+            # Repeat some orders at the same price so runs of repeated quotes occur
+            for i in reversed(range(len(product_orders))):
+                if self.rng.random() < 0.3:
+                    order = product_orders[i]
+                    product_orders.insert(i + 1, Order(product, order.price, order.quantity // 2 or order.quantity))
+            orders[product] = product_orders
+        return orders, 0
+
+
+def replay(cls, paths, seed, orders_per_side):
+    backtester = cls(paths, RandomTrader(seed, orders_per_side))
+    fills = []
+    reset = backtester.reset
+
+    def reset_and_record():
+        # run() starts from a reset, which replaces the position trackers
+        reset()
+        for product, tracker in backtester.position_trackers.items():
+            def add_trade(quantity, price, product=product, add_trade=tracker.add_trade):
+                fills.append((product, quantity, price))
+                add_trade(quantity, price)
+            tracker.add_trade = add_trade
+
+    backtester.reset = reset_and_record
+    matching = [0.0]
+    match = backtester._match_product_orders
+
+    def timed_match(*args):
+        start = time.perf_counter()
+        match(*args)
+        matching[0] += time.perf_counter() - start
+
+    backtester._match_product_orders = timed_match
+    with contextlib.redirect_stdout(io.StringIO()):
+        backtester.run()
+    return backtester, fills, matching[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default="data")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--orders", type=int, default=3, help="orders per side per product per tick")
+    args = parser.parse_args()
+
+    catalog = DataCatalog(args.data)
+    for product in catalog.products():
+        paths = catalog.data_paths([product])
+        engine, engine_fills, engine_s = replay(MultiProductBacktester, paths, args.seed, args.orders)
+        reference, reference_fills, reference_s = replay(ReferenceBacktester, paths, args.seed, args.orders)
+        same = (engine_fills and engine_fills == reference_fills
+                and np.array_equal(engine.fill_log.data, reference.fill_log.data)
+                and np.array_equal(engine.overall_pnl_history, reference.overall_pnl_history)
+                and np.array_equal(engine.history.series('position'), reference.history.series('position')))
+        print(f"{product:<12}{len(engine_fills):>8} fills  engine {engine_s:6.2f}s  "
+              f"reference {reference_s:6.2f}s  {'identical' if same else 'DIFFERENT'}")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Measure the engine's per-tick cost with a trader that does nothing.
+
+Usage (from Week4Onwards/):
+    python benchmarks/tick_overhead.py [data_root] [--products A,B] [--repeat N]
+
+The trader returns no orders, so the time per tick is what the backtester spends
+around the strategy: advancing the books, handing the trader its state, matching
+and recording metrics. Data is loaded once and each repeat is a fresh run().
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.backtester import MultiProductBacktester  # noqa: E402
+from src.catalog import DataCatalog  # noqa: E402
+
+
+class NullTrader:
+    """Looks at nothing and sends no orders"""
+
+    def run(self, state):
+        return {}, 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("data_root", nargs="?", default="data")
+    parser.add_argument("--products", help="comma-separated subset (default: every product found)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    catalog = DataCatalog(args.data_root)
+    products = args.products.split(",") if args.products else catalog.products()
+    backtester = MultiProductBacktester(catalog.data_paths(products), NullTrader())
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        backtester.run()  # untimed: the first run also parses the data
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            backtester.run()
+        best = min(best, time.perf_counter() - start)
+
+    ticks = backtester.call_stats['ticks']
+    print(f"{len(products)} products, {ticks} ticks")
+    print(f"best of {args.repeat} runs {best:.3f}s, {best / ticks * 1e6:.2f} us per tick")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,7 @@ class SudowoodoStrategy(BaseClass): # Inherit from Base Class
     def get_orders(self, state, orderbook, position):
         orders = []
         
-        if not orderbook.buy_orders and not orderbook.sell_orders:
+        if orderbook.best_bid is None and orderbook.best_ask is None:
             return orders
         # LOGIC FROM THE NOTEBOOK SHARED ON NOTION FOR SUDOWOODO
         orders.append(Order(self.product_name, self.fair_value + 2, -10))
@@ -47,11 +47,11 @@ class Abra(BaseClass):
     def get_orders(self, state, orderbook: OrderBook, position: int):
         orders = []
 
-        if not orderbook.buy_orders or not orderbook.sell_orders:
+        if orderbook.best_bid is None or orderbook.best_ask is None:
             return orders
 
-        best_bid = max(orderbook.buy_orders.keys())
-        best_ask = min(orderbook.sell_orders.keys())
+        best_bid = orderbook.best_bid
+        best_ask = orderbook.best_ask
         mid_price = (best_bid + best_ask) / 2
 
         self.prices.append(mid_price)
@@ -112,11 +112,11 @@ class Ash(BaseClass):
     def get_orders(self, state, orderbook: OrderBook, position: int):
         orders = []
 
-        if not orderbook.buy_orders or not orderbook.sell_orders:
+        if orderbook.best_bid is None or orderbook.best_ask is None:
             return orders
 
-        best_bid = max(orderbook.buy_orders.keys())
-        best_ask = min(orderbook.sell_orders.keys())
+        best_bid = orderbook.best_bid
+        best_ask = orderbook.best_ask
         mid_price = (best_bid + best_ask) / 2
 
         self.prices.append(mid_price)
@@ -174,11 +174,11 @@ class Jolteon(BaseClass):
     def get_orders(self, state, orderbook: OrderBook, position: int):
         orders = []
 
-        if not orderbook.buy_orders or not orderbook.sell_orders:
+        if orderbook.best_bid is None or orderbook.best_ask is None:
             return orders
 
-        best_bid = max(orderbook.buy_orders.keys())
-        best_ask = min(orderbook.sell_orders.keys())
+        best_bid = orderbook.best_bid
+        best_ask = orderbook.best_ask
         mid_price = (best_bid + best_ask) / 2
 
         self.prices.append(mid_price)
@@ -239,12 +239,12 @@ class LuxrayStrategy(BaseClass):
         orders = []
 
         # Skip if no valid book data
-        if not orderbook.buy_orders or not orderbook.sell_orders:
+        if orderbook.best_bid is None or orderbook.best_ask is None:
             return orders
 
         # Get best bid/ask and mid-price
-        best_bid = max(orderbook.buy_orders.keys())
-        best_ask = min(orderbook.sell_orders.keys())
+        best_bid = orderbook.best_bid
+        best_ask = orderbook.best_ask
         mid_price = (best_bid + best_ask) / 2
 
         self.prices.append(mid_price)
@@ -312,11 +312,11 @@ class ShinxStrategy(BaseClass):
     def get_orders(self, state, orderbook, position):
         orders = []
 
-        if not orderbook.buy_orders or not orderbook.sell_orders:
+        if orderbook.best_bid is None or orderbook.best_ask is None:
             return orders
 
-        best_ask = min(orderbook.sell_orders.keys())
-        best_bid = max(orderbook.buy_orders.keys())
+        best_ask = orderbook.best_ask
+        best_bid = orderbook.best_bid
         mid_price = (best_ask + best_bid) // 2
 
         
@@ -376,11 +376,11 @@ class NewDrowzeeStrategy(BaseClass):
     def get_orders(self, state, orderbook, position):
         orders = []
 
-        if not orderbook.buy_orders or not orderbook.sell_orders:
+        if orderbook.best_bid is None or orderbook.best_ask is None:
             return orders
 
-        best_bid = max(orderbook.buy_orders.keys())
-        best_ask = min(orderbook.sell_orders.keys())
+        best_bid = orderbook.best_bid
+        best_ask = orderbook.best_ask
         mid_price = (best_bid + best_ask) / 2
 
         self.prices.append(mid_price)
@@ -448,11 +448,11 @@ class DrowzeeStrategy(BaseClass):
     
     def get_orders(self, state, orderbook, position):
         orders = []
-        if not orderbook.buy_orders and not orderbook.sell_orders:
+        if orderbook.best_bid is None and orderbook.best_ask is None:
             return orders
         
-        best_ask = min(orderbook.sell_orders.keys()) if orderbook.sell_orders else None
-        best_bid = max(orderbook.buy_orders.keys()) if orderbook.buy_orders else None
+        best_ask = orderbook.best_ask
+        best_bid = orderbook.best_bid
         mid_price = (best_ask + best_bid) // 2
         self.prices.append(mid_price)
 
@@ -507,11 +507,11 @@ class JolteonBBRSIStrategy(BaseClass):
     def get_orders(self, state, orderbook: OrderBook, position: int):
         orders = []
 
-        if not orderbook.buy_orders or not orderbook.sell_orders:
+        if orderbook.best_bid is None or orderbook.best_ask is None:
             return orders
 
-        best_bid = max(orderbook.buy_orders.keys())
-        best_ask = min(orderbook.sell_orders.keys())
+        best_bid = orderbook.best_bid
+        best_ask = orderbook.best_ask
         mid_price = (best_bid + best_ask) / 2
 
         self.prices.append(mid_price)
@@ -0,0 +1,188 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+# Where a fill's liquidity came from
+SOURCE_BOOK = 0
+SOURCE_TAPE = 1
+SOURCE_CLEAR = 2  # the end-of-run flattening trade at mid
+FILL_DTYPE = np.dtype([
+    ("timestamp", np.int64),
+    ("product", np.int32),  # index into FillLog.products
+    ("order_no", np.int64),  # engine order number, -1 for the auto-clear
+    ("side", np.int8),  # 1 buy, -1 sell
+    ("price", np.float64),
+    ("quantity", np.int64),  # unsigned
+    ("source", np.int8),
+])
+
+
+class FillLog:
+    """
+    Append-only log of fills in a FILL_DTYPE structured array
+
+    append() and extend() only queue tuples; queued fills are copied into the buffer in chunks of
+    FLUSH_EVERY and whenever `data` is read. The buffer doubles when it fills up, so
+    appends are amortised O(1) and cheap enough to leave on. `data` is a view of the
+    rows written so far.
+    """
+    FLUSH_EVERY = 4096
+
+    def __init__(self, products=(), capacity=1024):
+        self.products = list(products)
+        self._buffer = np.empty(capacity, dtype=FILL_DTYPE)
+        self._size = 0
+        self._pending = []
+
+    def __len__(self):
+        return self._size + len(self._pending)
+
+    def append(self, timestamp, product, order_no, side, price, quantity, source):
+        self._pending.append((timestamp, product, order_no, side, price, quantity, source))
+        if len(self._pending) >= self.FLUSH_EVERY:
+            self._flush()
+
+    def extend(self, rows):
+        """Append (timestamp, product, order_no, side, price, quantity, source) rows"""
+        self._pending.extend(rows)
+        if len(self._pending) >= self.FLUSH_EVERY:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        size = self._size + len(self._pending)
+        if size > len(self._buffer):
+            grown = np.empty(max(size, 2 * len(self._buffer)), dtype=FILL_DTYPE)
+            grown[:self._size] = self._buffer[:self._size]
+            self._buffer = grown
+        # Column by column: cheaper than building a structured array from the tuples
+        rows = self._buffer[self._size:size]
+        for name, column in zip(FILL_DTYPE.names, zip(*self._pending)):
+            rows[name] = column
+        self._size = size
+        self._pending = []
+
+    @property
+    def data(self) -> np.ndarray:
+        self._flush()
+        return self._buffer[:self._size]
+
+    def for_product(self, product) -> np.ndarray:
+        """Fills of one product, by name"""
+        data = self.data
+        return data[data["product"] == self.products.index(product)]
+
+    def save(self, path):
+        """Write the fills as a .npy file (np.load gives the structured array back)"""
+        np.save(path, self.data)
+
+
+@dataclass
+class PnLCurves:
+    """
+    Per-tick accounting for one product, each value taken after that tick's fills
+
+    realized/unrealized follow PositionTracker's FIFO lots; avg_realized/avg_unrealized
+    use average-cost accounting instead. Both split the same mark-to-mid total.
+    """
+    position: np.ndarray
+    cash: np.ndarray  # -sum(quantity * price), the legacy `pnls` figure
+    realized: np.ndarray
+    unrealized: np.ndarray
+    total: np.ndarray  # cash + position * mid
+    avg_realized: np.ndarray
+    avg_unrealized: np.ndarray
+
+
+def _stream_cost(quantities, prices, units):
+    """Cost of the first `units` units of a fill stream (quantities > 0, in fill order)"""
+    if not len(quantities):
+        return np.zeros(len(units))
+    cumulative_quantity = np.cumsum(quantities)
+    cumulative_cost = np.cumsum(quantities * prices)
+    fill = np.minimum(np.searchsorted(cumulative_quantity, units, side="left"), len(quantities) - 1)
+    return cumulative_cost[fill] - (cumulative_quantity[fill] - units) * prices[fill]
+
+
+def fifo_open_cost(quantities, prices):
+    """
+    Cost of the open long and open short lots after each fill under FIFO
+
+    FIFO always closes the oldest lots, so with a position of P > 0 the open lots are the
+    last P units bought (the buy that flipped the position opens its remainder at its own
+    price, so it makes no difference which of its units count as closing), and likewise
+    for shorts. That turns the lot queue into lookups on the cumulative cost of each side.
+    """
+    position = np.cumsum(quantities)
+    buys, sells = quantities > 0, quantities < 0
+    bought = np.cumsum(np.where(buys, quantities, 0))
+    sold = np.cumsum(np.where(sells, -quantities, 0))
+
+    long_open = np.maximum(position, 0)
+    short_open = np.maximum(-position, 0)
+    buy_quantities, buy_prices = quantities[buys], prices[buys]
+    sell_quantities, sell_prices = -quantities[sells], prices[sells]
+    long_cost = (_stream_cost(buy_quantities, buy_prices, bought)
+                 - _stream_cost(buy_quantities, buy_prices, bought - long_open))
+    short_cost = (_stream_cost(sell_quantities, sell_prices, sold)
+                  - _stream_cost(sell_quantities, sell_prices, sold - short_open))
+    return long_cost, short_cost
+
+
+def average_open_cost(quantities, prices):
+    """
+    Signed cost (average price x position) of the open position after each fill
+
+    Average cost is a running recurrence (a reduction keeps the average, a flip reopens
+    at the fill price), so this is one pass over the fills rather than the ticks.
+    """
+    open_cost = np.empty(len(quantities))
+    position, cost = 0, 0.0
+    for i, (quantity, price) in enumerate(zip(quantities.tolist(), prices.tolist())):
+        if position == 0 or (position > 0) == (quantity > 0):
+            cost += quantity * price
+        elif abs(quantity) <= abs(position):
+            cost *= (position + quantity) / position
+        else:
+            cost = (position + quantity) * price
+        position += quantity
+        open_cost[i] = cost
+    return open_cost
+
+
+def pnl_curves(fill_ticks, quantities, prices, mids) -> PnLCurves:
+    """
+    Rebuild one product's per-tick accounting from its fills and mid prices
+
+    fill_ticks (sorted), quantities (signed) and prices describe the fills in the order
+    they happened; mids holds the mark price of every tick. Figures are exact for the
+    integer and half-tick prices the backtester trades at, so they equal what
+    PositionTracker reports tick by tick.
+    """
+    fill_ticks = np.asarray(fill_ticks, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    mids = np.asarray(mids, dtype=np.float64)
+
+    # Everything is first computed per fill; a leading 0 covers ticks before the first fill
+    position = np.concatenate([[0], np.cumsum(quantities)])
+    cash = np.concatenate([[0.0], -np.cumsum(quantities * prices)])
+    long_cost, short_cost = fifo_open_cost(quantities, prices)
+    open_cost = np.concatenate([[0.0], long_cost - short_cost])
+    average_cost = np.concatenate([[0.0], average_open_cost(quantities, prices)])
+
+    last_fill = np.searchsorted(fill_ticks, np.arange(len(mids)), side="right")
+    position, cash = position[last_fill], cash[last_fill]
+    open_cost, average_cost = open_cost[last_fill], average_cost[last_fill]
+
+    value = position * mids
+    return PnLCurves(
+        position=position,
+        cash=cash,
+        realized=cash + open_cost,
+        unrealized=value - open_cost,
+        total=cash + value,
+        avg_realized=cash + average_cost,
+        avg_unrealized=value - average_cost,
+    )
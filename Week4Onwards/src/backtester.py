@@ -1,12 +1,41 @@
-import csv
-from dataclasses import dataclass
-from typing import List, Dict
+import heapq
+import itertools
+import math
+from collections import deque
+from collections.abc import Mapping
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from .accounting import SOURCE_BOOK, SOURCE_CLEAR, SOURCE_TAPE, FillLog, pnl_curves
+from .history import RunHistory
+from .marketdata import (EMPTY_LEVEL, PRICE_LEVELS, MarketDataStore, ParsedDataCache, PriceData, TradeTape,
+                         align_timestamps, freeze, ingest_file, iter_price_csv, iter_price_data, iter_trade_data,
+                         iter_trades_csv, validate_price_data, validate_trade_data)
+
+PRICE_EVENT = 0
+TRADE_EVENT = 1
+
+# Inputs an event-driven trader can be woken by
+TRADER_EVENTS = ('book', 'trades', 'fills')
 
 @dataclass
 class Order:
     symbol: str
     price: int
     quantity: int
+    # Orders with an id rest across ticks until filled or cancelled; sending another
+    # order with the same id replaces it. Orders without one are matched for one tick only.
+    order_id: Optional[Hashable] = None
+
+@dataclass
+class Cancel:
+    """Remove the resting order `order_id` of `symbol`"""
+    symbol: str
+    order_id: Hashable
 
 @dataclass
 class Trade:
@@ -14,34 +43,315 @@ class Trade:
     price: int
     quantity: int
 
+@dataclass
+class OrderResult:
+    """How one order was filled; quantities are signed like order.quantity"""
+    order: Order
+    filled: int = 0
+    fills: List[Tuple[int, int]] = field(default_factory=list)  # (price, quantity) in fill order
+    order_no: int = -1  # engine order number, as in the fill log
+
+class TradingState:
+    """
+    What a trader's run(state) is given each tick
+
+    timestamp: the tick being simulated
+    order_depth: read-only {product: OrderBook}, already updated to this tick
+    positions: {product: position}
+    resting_orders: {product: {order_id: Order}} still working from earlier ticks
+    own_fills: OrderResults of the previous tick's orders that filled
+    market_trades: {product: (prices, quantities)} printed this tick, before own fills
+
+    The backtester allocates one state per run and updates it in place, so the
+    mappings are live: copy anything that should outlast the run(state) call.
+    """
+    __slots__ = ('timestamp', 'order_depth', 'positions', 'resting_orders', 'own_fills', 'market_trades')
+
+    def __init__(self, order_depth, positions, resting_orders):
+        self.timestamp = None
+        self.order_depth = order_depth
+        self.positions = positions
+        self.resting_orders = resting_orders
+        self.own_fills = []
+        self.market_trades = {}
+
+ALL_LEVELS_CHANGED = (True,) * (2 * PRICE_LEVELS)
+NO_LEVELS_CHANGED = (False,) * (2 * PRICE_LEVELS)
+
+
 class OrderBook:
+    """
+    Price -> volume mappings for each side plus summaries derived from them
+
+    update_from_arrays only records which row of the loaded data the book shows;
+    the row is read into per-tick dicts the first time a side is used, and the
+    summaries the first time one is read. Until then best_bid/best_ask/mid_price/
+    spread come straight from PriceData.top_of_book. buy_orders/sell_orders are
+    read-only views; the matcher consumes liquidity through own_orders(), so the
+    loaded arrays are never written. best_bid/best_ask/mid_price/spread are None
+    when a side is empty; bid_prices/ask_prices list the levels best first with
+    matching *_volumes, and bid_depth/ask_depth are the total volume on each side.
+
+    `changed` says whether the last update moved the book and `change_mask` which
+    levels it moved (bid levels 1..PRICE_LEVELS, then ask levels). An unchanged
+    snapshot keeps the dicts and summaries as they are; a partly changed one of
+    validated data only rewrites the levels that moved.
+    """
+
     def __init__(self):
-        self.buy_orders: Dict[int, int] = {}  # price -> volume
-        self.sell_orders: Dict[int, int] = {}
+        self._buy_orders = {}  # price -> volume
+        self._sell_orders = {}
+        self._buy_view = MappingProxyType(self._buy_orders)
+        self._sell_view = MappingProxyType(self._sell_orders)
+        self._source = None  # PriceData the book currently shows, until liquidity is consumed
+        self._source_row = None
+        self._read = True  # False while the source row has not been read into the dicts
+        self._snapshot = None  # last update_from_levels arguments
+        self._levels = None
+        self._arrays = None  # (PriceData, best bids, best asks, changed rows, level changes) last pointed at
+        self._mask_row = None  # row of the level changes to read change_mask from, when it is not set
+        self.changed = True
+        self._change_mask = ALL_LEVELS_CHANGED
+
+    @property
+    def buy_orders(self) -> Mapping:
+        if not self._read:
+            self._read_row()
+        return self._buy_view
+
+    @buy_orders.setter
+    def buy_orders(self, orders):
+        self.own_orders()
+        self._set_sides(dict(orders), self._sell_orders)
+
+    @property
+    def sell_orders(self) -> Mapping:
+        if not self._read:
+            self._read_row()
+        return self._sell_view
+
+    @sell_orders.setter
+    def sell_orders(self, orders):
+        self.own_orders()
+        self._set_sides(self._buy_orders, dict(orders))
 
     def update_from_price_row(self, row):
-        self.buy_orders.clear()
-        self.sell_orders.clear()
+        buy_orders, sell_orders = {}, {}
         
         for i in range(1, 4):
             bp = int(row[f"bid_price_{i}"]) if row[f"bid_price_{i}"] else None
             bv = int(row[f"bid_volume_{i}"]) if row[f"bid_volume_{i}"] else 0
             if bp is not None:
-                self.buy_orders[bp] = bv
+                buy_orders[bp] = bv
 
             ap = int(row[f"ask_price_{i}"]) if row[f"ask_price_{i}"] else None
             av = int(row[f"ask_volume_{i}"]) if row[f"ask_volume_{i}"] else 0
             if ap is not None:
-                self.sell_orders[ap] = av
+                sell_orders[ap] = av
+
+        self._source = self._snapshot = None
+        self._mark_changed(ALL_LEVELS_CHANGED)
+        self._set_sides(buy_orders, sell_orders)
+
+    def update_from_arrays(self, data: PriceData, row: int):
+        """Point the book at one row of columnar price data, applying only what changed since the last row"""
+        follows = self._source is data and self._source_row == row - 1
+        self._source, self._source_row, self._snapshot = data, row, None
+        if self._arrays is None or self._arrays[0] is not data:
+            self._arrays = (data, *data.top_of_book(), data.changed_rows(), data.change_mask())
+        if not follows:
+            self._mark_changed(ALL_LEVELS_CHANGED)
+        elif not self._arrays[3].item(row):
+            self._mark_changed(NO_LEVELS_CHANGED, False)
+            return
+        else:
+            self._mark_changed(None)  # read from the level changes when asked for
+            self._mask_row = row
+            if self._read and data.clean:
+                # Validated rows have unique prices per side, so levels can be swapped one by one
+                self._apply_deltas(data, row)
+                return
+        self._read = False
+        self._levels = None
+
+    def update_from_levels(self, bid_prices, bid_volumes, ask_prices, ask_volumes):
+        """Refresh the book from per-level sequences; EMPTY_LEVEL prices are skipped"""
+        snapshot = (bid_prices, bid_volumes, ask_prices, ask_volumes)
+        if self._snapshot is not None:
+            if snapshot == self._snapshot:
+                self._mark_changed(NO_LEVELS_CHANGED, False)
+                return
+            self._mark_changed(tuple(
+                new_price != old_price or new_volume != old_volume
+                for new_prices, new_volumes, old_prices, old_volumes in (
+                    (bid_prices, bid_volumes, self._snapshot[0], self._snapshot[1]),
+                    (ask_prices, ask_volumes, self._snapshot[2], self._snapshot[3]))
+                for new_price, new_volume, old_price, old_volume in zip(
+                    new_prices, new_volumes, old_prices, old_volumes)))
+        else:
+            self._mark_changed(ALL_LEVELS_CHANGED)
+
+        buy_orders, sell_orders = {}, {}
+
+        for bp, bv in zip(bid_prices, bid_volumes):
+            if bp != EMPTY_LEVEL:
+                buy_orders[bp] = bv
+
+        for ap, av in zip(ask_prices, ask_volumes):
+            if ap != EMPTY_LEVEL:
+                sell_orders[ap] = av
+
+        self._source = None
+        self._snapshot = snapshot
+        self._set_sides(buy_orders, sell_orders)
+
+    def hold(self):
+        """Keep the book as it is for a tick that brought no snapshot"""
+        self._mark_changed(NO_LEVELS_CHANGED, False)
+
+    def own_orders(self):
+        """Return this tick's (buy_orders, sell_orders) dicts for in-place consumption"""
+        if not self._read:
+            self._read_row()
+        # The book no longer matches its snapshot, so the next update rebuilds it in full
+        self._source = self._snapshot = None
+        self._levels = None
+        return self._buy_orders, self._sell_orders
+
+    def _mark_changed(self, change_mask, changed=True):
+        self._change_mask = change_mask
+        self.changed = changed
+
+    @property
+    def change_mask(self):
+        if self._change_mask is None:
+            self._change_mask = tuple(self._arrays[4][self._mask_row].tolist())
+        return self._change_mask
+
+    def _read_row(self):
+        data, row = self._source, self._source_row
+        if data.clean:
+            # Validated rows have contiguous populated levels, so no per-level checks are needed
+            bid_count, ask_count = data.bid_level_counts.item(row), data.ask_level_counts.item(row)
+            buy_orders = dict(zip(data.bid_prices[row, :bid_count].tolist(),
+                                  data.bid_volumes[row, :bid_count].tolist()))
+            sell_orders = dict(zip(data.ask_prices[row, :ask_count].tolist(),
+                                   data.ask_volumes[row, :ask_count].tolist()))
+        else:
+            buy_orders = {p: v for p, v in zip(data.bid_prices[row].tolist(), data.bid_volumes[row].tolist())
+                          if p != EMPTY_LEVEL}
+            sell_orders = {p: v for p, v in zip(data.ask_prices[row].tolist(), data.ask_volumes[row].tolist())
+                           if p != EMPTY_LEVEL}
+        self._set_sides(buy_orders, sell_orders)
+
+    def _apply_deltas(self, data, row):
+        """Move the already read dicts from row - 1 to row by rewriting the changed levels"""
+        sides = ((self._buy_orders, data.bid_prices, data.bid_volumes),
+                 (self._sell_orders, data.ask_prices, data.ask_volumes))
+        changed = [divmod(i, PRICE_LEVELS) for i, moved in enumerate(self.change_mask) if moved]
+        for side, level in changed:
+            orders, prices, _ = sides[side]
+            old_price = int(prices[row - 1, level])
+            if old_price != EMPTY_LEVEL:
+                orders.pop(old_price, None)
+        for side, level in changed:
+            orders, prices, volumes = sides[side]
+            price = int(prices[row, level])
+            if price != EMPTY_LEVEL:
+                orders[price] = int(volumes[row, level])
+        self._levels = None
+
+    def _set_sides(self, buy_orders, sell_orders):
+        self._buy_orders = buy_orders
+        self._sell_orders = sell_orders
+        self._buy_view = MappingProxyType(buy_orders)
+        self._sell_view = MappingProxyType(sell_orders)
+        self._read = True
+        self._levels = None
+
+    def _summary(self):
+        if not self._read:
+            self._read_row()
+        buy_orders, sell_orders = self._buy_orders, self._sell_orders
+        bid_prices = sorted(buy_orders, reverse=True)
+        ask_prices = sorted(sell_orders)
+        bid_volumes = [buy_orders[p] for p in bid_prices]
+        ask_volumes = [sell_orders[p] for p in ask_prices]
+        best_bid = bid_prices[0] if bid_prices else None
+        best_ask = ask_prices[0] if ask_prices else None
+        if best_bid is None or best_ask is None:
+            mid_price = spread = None
+        else:
+            mid_price = (best_bid + best_ask) / 2
+            spread = best_ask - best_bid
+        self._levels = (bid_prices, bid_volumes, ask_prices, ask_volumes,
+                        sum(bid_volumes), sum(ask_volumes), best_bid, best_ask, mid_price, spread)
+        return self._levels
+
+    bid_prices = property(lambda self: (self._levels or self._summary())[0])
+    bid_volumes = property(lambda self: (self._levels or self._summary())[1])
+    ask_prices = property(lambda self: (self._levels or self._summary())[2])
+    ask_volumes = property(lambda self: (self._levels or self._summary())[3])
+    bid_depth = property(lambda self: (self._levels or self._summary())[4])
+    ask_depth = property(lambda self: (self._levels or self._summary())[5])
+
+    def _source_top(self):
+        """(best_bid, best_ask) of the source row, None for an empty side"""
+        _, best_bids, best_asks, _, _ = self._arrays
+        best_bid, best_ask = best_bids.item(self._source_row), best_asks.item(self._source_row)
+        return None if best_bid == EMPTY_LEVEL else best_bid, None if best_ask == EMPTY_LEVEL else best_ask
+
+    @property
+    def best_bid(self):
+        if self._source is not None:
+            return self._source_top()[0]
+        return (self._levels or self._summary())[6]
+
+    @property
+    def best_ask(self):
+        if self._source is not None:
+            return self._source_top()[1]
+        return (self._levels or self._summary())[7]
+
+    @property
+    def mid_price(self):
+        if self._source is not None:
+            best_bid, best_ask = self._source_top()
+            return None if best_bid is None or best_ask is None else (best_bid + best_ask) / 2
+        return (self._levels or self._summary())[8]
+
+    @property
+    def spread(self):
+        if self._source is not None:
+            best_bid, best_ask = self._source_top()
+            return None if best_bid is None or best_ask is None else best_ask - best_bid
+        return (self._levels or self._summary())[9]
+
+
+def _side_levels(orderbook, side):
+    """(prices best first, price -> volume) of the side an order on `side` trades against"""
+    volumes = orderbook.sell_orders if side > 0 else orderbook.buy_orders
+    return sorted(volumes, reverse=side < 0), volumes
+
 
 class PositionTracker:
-    """Tracks realized and unrealized PnL using FIFO accounting"""
+    """
+    Tracks realized and unrealized PnL using FIFO accounting
+
+    Open lots sit in deques, and the open quantity and quantity x price of each side are
+    kept as running sums, so unrealized PnL and average cost are O(1) however many lots
+    are open.
+    """
     
     def __init__(self):
         self.position = 0
         self.realized_pnl = 0.0
-        self.long_queue = []  # [(quantity, price), ...] for long positions
-        self.short_queue = []  # [(quantity, price), ...] for short positions
+        self.long_queue = deque()  # (quantity, price) lots for long positions, oldest first
+        self.short_queue = deque()  # (quantity, price) lots for short positions, oldest first
+        self.long_quantity = 0
+        self.long_cost = 0  # sum of quantity * price over long lots
+        self.short_quantity = 0
+        self.short_cost = 0
 
     def add_trade(self, quantity, price):
         """Add a trade and calculate realized PnL using FIFO"""
@@ -59,20 +369,23 @@ class PositionTracker:
         # First, close any short positions (realize profit/loss)
         while remaining_qty > 0 and self.short_queue:
             short_qty, short_price = self.short_queue[0]
-            if remaining_qty >= short_qty:
+            closed = min(remaining_qty, short_qty)
+            self.realized_pnl += closed * (short_price - price)
+            self.short_quantity -= closed
+            self.short_cost -= closed * short_price
+            remaining_qty -= closed
+            if closed == short_qty:
                 # Close entire short position
-                self.realized_pnl += short_qty * (short_price - price)
-                remaining_qty -= short_qty
-                self.short_queue.pop(0)
+                self.short_queue.popleft()
             else:
                 # Partially close short position
-                self.realized_pnl += remaining_qty * (short_price - price)
-                self.short_queue[0] = (short_qty - remaining_qty, short_price)
-                remaining_qty = 0
+                self.short_queue[0] = (short_qty - closed, short_price)
         
         # Add remaining quantity as new long position
         if remaining_qty > 0:
             self.long_queue.append((remaining_qty, price))
+            self.long_quantity += remaining_qty
+            self.long_cost += remaining_qty * price
 
     def _process_sell(self, quantity, price):
         """Process a sell trade"""
@@ -81,52 +394,38 @@ class PositionTracker:
         # First, close any long positions (realize profit/loss)
         while remaining_qty > 0 and self.long_queue:
             long_qty, long_price = self.long_queue[0]
-            if remaining_qty >= long_qty:
+            closed = min(remaining_qty, long_qty)
+            self.realized_pnl += closed * (price - long_price)
+            self.long_quantity -= closed
+            self.long_cost -= closed * long_price
+            remaining_qty -= closed
+            if closed == long_qty:
                 # Close entire long position
-                self.realized_pnl += long_qty * (price - long_price)
-                remaining_qty -= long_qty
-                self.long_queue.pop(0)
+                self.long_queue.popleft()
             else:
                 # Partially close long position
-                self.realized_pnl += remaining_qty * (price - long_price)
-                self.long_queue[0] = (long_qty - remaining_qty, long_price)
-                remaining_qty = 0
+                self.long_queue[0] = (long_qty - closed, long_price)
         
         # Add remaining quantity as new short position
         if remaining_qty > 0:
             self.short_queue.append((remaining_qty, price))
+            self.short_quantity += remaining_qty
+            self.short_cost += remaining_qty * price
 
     def get_unrealized_pnl(self, current_price):
         """Calculate unrealized PnL at current market price"""
-        unrealized = 0.0
-        
-        # Unrealized PnL from long positions
-        for qty, entry_price in self.long_queue:
-            unrealized += qty * (current_price - entry_price)
-        
-        # Unrealized PnL from short positions
-        for qty, entry_price in self.short_queue:
-            unrealized += qty * (entry_price - current_price)
-        
-        return unrealized
+        # Sum of qty * (current_price - entry) over long lots plus qty * (entry - current_price) over short lots
+        return float(self.long_quantity * current_price - self.long_cost
+                     + self.short_cost - self.short_quantity * current_price)
 
     def get_average_cost(self):
         """Get average cost/price of current position"""
         if self.position == 0:
             return 0.0
         
-        total_cost = 0.0
-        total_qty = 0
-        
-        for qty, price in self.long_queue:
-            total_cost += qty * price
-            total_qty += qty
-        
-        for qty, price in self.short_queue:
-            total_cost += qty * price  # Short positions have "negative cost"
-            total_qty += qty
-        
-        return total_cost / total_qty if total_qty > 0 else 0.0
+        # Short positions have "negative cost" but are averaged alongside the longs as before
+        total_qty = self.long_quantity + self.short_quantity
+        return (self.long_cost + self.short_cost) / total_qty if total_qty > 0 else 0.0
 
 class MultiProductBacktester:
     POSITION_LIMIT = {
@@ -140,320 +439,674 @@ class MultiProductBacktester:
         "DROWZEE": 50
     }
 
-    def __init__(self, product_data_paths: Dict[str, Dict[str, str]], trader):
+    def __init__(self, product_data_paths: Dict[str, Dict[str, str]], trader, cache: ParsedDataCache = None,
+                 streaming: bool = False, load_workers: int = 1, progress_callback=None,
+                 start_ts: int = None, end_ts: int = None, aggregate_trades: bool = False,
+                 validate: bool = False, repair: bool = False, event_driven: bool = False,
+                 subscriptions=TRADER_EVENTS, heartbeat: int = None, deferred_pnl: bool = False):
         """
         Initialize backtester for multiple products
         
         Args:
             product_data_paths: Dict of {product_name: {'price_csv': path, 'trades_csv': path}}
+                or {product_name: {'store': MarketDataStore root}} for memory-mapped data
             trader: Trading strategy instance
+            cache: Optional ParsedDataCache so repeated runs skip CSV parsing
+            streaming: Replay ticks from lazily read files merged by timestamp instead of
+                loading everything first (input files must be sorted by timestamp)
+            load_workers: Number of processes used to parse CSVs in parallel
+            progress_callback: Called with an IngestProgress after each file is parsed
+            start_ts, end_ts: Optional inclusive timestamp window to load and simulate
+            aggregate_trades: Merge same-price prints within a timestamp when packing the trade tape
+            validate: Check each product's data once after loading (not used when streaming)
+            repair: With validate, fix the problems found instead of only reporting them
+            event_driven: Call the trader only on ticks where one of `subscriptions` changed or
+                the heartbeat is due; histories are carried forward over ticks where nothing did
+            subscriptions: Collection of inputs that wake an event-driven trader, from TRADER_EVENTS: 'book'
+                (any book update moved a level), 'trades' (prints this tick), 'fills' (own fills
+                on the previous tick)
+            heartbeat: With event_driven, also call the trader once at least this many
+                timestamp units have passed since its last call
+            deferred_pnl: Only log fills and mid prices during the run and rebuild every PnL
+                history from them in one NumPy pass at the end; position_trackers are
+                brought up to date from the fill log then
         """
         self.product_data_paths = product_data_paths
         self.trader = trader
+        self.cache = cache
+        self.streaming = streaming
+        self.load_workers = load_workers
+        self.progress_callback = progress_callback
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+        self.aggregate_trades = aggregate_trades
+        self.validate = validate
+        self.repair = repair
+        self.event_driven = event_driven
+        if isinstance(subscriptions, str):
+            raise TypeError(f"subscriptions must be a collection of event names, e.g. ({subscriptions!r},)")
+        self.subscriptions = set(subscriptions)
+        unknown = self.subscriptions.difference(TRADER_EVENTS)
+        if unknown:
+            raise ValueError(f"Unknown subscriptions {sorted(unknown)}; expected names from {TRADER_EVENTS}")
+        self.heartbeat = heartbeat
+        self.deferred_pnl = deferred_pnl
         self.products = list(product_data_paths.keys())
+        self._product_ids = {product: i for i, product in enumerate(self.products)}  # product -> id in the fill log
         
-        # Per-product data storage
-        self.prices = {}  # {product: {timestamp: price_row_dict}}
-        self.trades = {}  # {product: {timestamp: [Trade, ...]}}
+        # Per-product data storage; read-only once loaded and shared by every run
+        self.prices = {}  # {product: PriceData}
+        self.tick_rows = {}  # {product: PriceData row shown at each tick, -1 where it did not update}
+        self.trades = {}  # {product: TradeTape}
+        self.validation_reports = {}  # {product: {'prices': ValidationReport, 'trades': ValidationReport}}
+        self.tick_timestamps = np.zeros(0, dtype=np.int64)  # every simulated timestamp of the loaded data
+        self.loaded = False
+
+        for product in self.products:
+            self.prices[product] = None
+            self.trades[product] = None
+
+        self.reset()
+
+    def reset(self):
+        """Clear everything a run produces (books, positions, orders, histories) but keep the loaded data"""
         self.orderbooks = {}  # {product: OrderBook}
         self.position_trackers = {}  # {product: PositionTracker}
+        self.last_order_results = []  # [OrderResult] for the most recent tick
+        self.match_stats = {'orders': 0, 'fast_path': 0}  # fast_path: orders rejected without matching
+        self.resting_orders = {product: {} for product in self.products}  # {product: {order_id: Order}}
+        self._resting_checked = {}  # {product: (position, max_pos) when its resting orders were last matched}
+        self.call_stats = {'ticks': 0, 'calls': 0, 'idle': 0}  # idle: ticks carried forward untouched
+        self._last_call = None  # (timestamp, max_pos) of the last trader call
+        self.fill_log = FillLog(self.products)  # every fill of the run, in fill order
+        self._order_numbers = {}  # {(symbol, order_id): order number} of resting orders
+        self._next_order_no = 0
+        self.accounting = {}  # {product: PnLCurves}, filled in at the end of a deferred_pnl run
         
         # Per-product legacy tracking (for backward compatibility)
         self.positions = {}  # {product: position}
         self.pnls = {}  # {product: pnl}
         
-        # Per-product history tracking
-        self.position_histories = {}  # {product: [positions]}
-        self.pnl_histories = {}  # {product: [pnls]}
-        self.realized_pnl_histories = {}  # {product: [realized_pnls]}
-        self.unrealized_pnl_histories = {}  # {product: [unrealized_pnls]}
-        self.total_pnl_histories = {}  # {product: [total_pnls]}
-        self.mid_price_histories = {}  # {product: [mid_prices]}
-        
-        # Overall tracking
-        self.timestamps = []
-        self.overall_pnl_history = []
-        self.overall_realized_pnl_history = []
-        self.overall_unrealized_pnl_history = []
+        # Per-tick metrics; the *_histories attributes are views of it once a run ends
+        self.history = RunHistory(self.products)
+        self._publish_histories()
         
         # Initialize per-product structures
         for product in self.products:
-            self.prices[product] = {}
-            self.trades[product] = {}
             self.orderbooks[product] = OrderBook()
             self.position_trackers[product] = PositionTracker()
             self.positions[product] = 0
             self.pnls[product] = 0
-            self.position_histories[product] = []
-            self.pnl_histories[product] = []
-            self.realized_pnl_histories[product] = []
-            self.unrealized_pnl_histories[product] = []
-            self.total_pnl_histories[product] = []
-            self.mid_price_histories[product] = []
+        self.state = TradingState(MappingProxyType(self.orderbooks), self.positions, self.resting_orders)
+
+    def _publish_histories(self):
+        """Point the history attributes at the rows recorded in self.history"""
+        history = self.history
+        self.timestamps = history.series('timestamps')
+        self.position_histories = history.by_product('position')  # {product: positions}
+        self.pnl_histories = history.by_product('pnl')  # {product: pnls}
+        self.realized_pnl_histories = history.by_product('realized')  # {product: realized_pnls}
+        self.unrealized_pnl_histories = history.by_product('unrealized')  # {product: unrealized_pnls}
+        self.total_pnl_histories = history.by_product('total')  # {product: total_pnls}
+        self.mid_price_histories = history.by_product('mid')  # {product: mid_prices}
+        self.overall_pnl_history = history.series('overall_total')
+        self.overall_realized_pnl_history = history.series('overall_realized')
+        self.overall_unrealized_pnl_history = history.series('overall_unrealized')
+
+    @classmethod
+    def from_catalog(cls, catalog, trader, products=None, **kwargs):
+        """Build a backtester for `products` (default: all) of a DataCatalog; only their files are opened"""
+        return cls(catalog.data_paths(products), trader, **kwargs)
 
     def load_data(self):
-        """Load price and trades data for all products"""
+        """Load price and trades data for all products; the arrays are made read-only"""
+        loaded = self._ingest()
+        if self.validate:
+            self._validate(loaded)
         for product in self.products:
-            price_path = self.product_data_paths[product]['price_csv']
-            trades_path = self.product_data_paths[product]['trades_csv']
-            
-            # Load price data
-            with open(price_path, newline='') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    ts = int(row['timestamp'])
-                    self.prices[product][ts] = row
-
-            # Load trades data
-            with open(trades_path, newline='') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    ts = int(row['timestamp'])
-                    trade = Trade(ts, int(row['price']), int(row['quantity']))
-                    self.trades[product].setdefault(ts, []).append(trade)
+            freeze(loaded[product]['prices'])
+
+        for product in self.products:
+            self.prices[product] = loaded[product]['prices']
+            self.prices[product].change_mask()  # per-level deltas between consecutive rows, used by the order books
+
+        # The ticks are every product's timestamps; each product gets the price row to show
+        # at each tick (later rows win on duplicates) and its trades are packed against them
+        self.tick_timestamps, tick_rows = align_timestamps(
+            [self.prices[product].timestamps for product in self.products])
+        self.tick_timestamps.flags.writeable = False
+        for product, rows in zip(self.products, tick_rows):
+            rows.flags.writeable = False
+            self.tick_rows[product] = rows
+        for product in self.products:
+            self.trades[product] = freeze(TradeTape.from_trades(loaded[product]['trades'], self.tick_timestamps,
+                                                                self.aggregate_trades))
+        self.loaded = True
+
+    def _validate(self, loaded):
+        """Validate (and optionally repair) loaded data so the tick loop can trust it"""
+        for product in self.products:
+            prices, price_report = validate_price_data(loaded[product]['prices'], self.repair)
+            trades, trade_report = validate_trade_data(loaded[product]['trades'], self.repair)
+            loaded[product]['prices'] = prices
+            loaded[product]['trades'] = trades
+            self.validation_reports[product] = {'prices': price_report, 'trades': trade_report}
+            if not (price_report.ok and trade_report.ok):
+                print(f"Data check {product}: prices {price_report.summary()}; trades {trade_report.summary()}")
+
+    def _ingest(self):
+        """Read every product's files, parsing CSVs in parallel when load_workers > 1"""
+        loaded = {product: {} for product in self.products}
+        jobs = []
+        for product in self.products:
+            paths = self.product_data_paths[product]
+            if 'store' in paths:
+                store = MarketDataStore(paths['store'])
+                loaded[product]['prices'] = store.open_prices(product, self.start_ts, self.end_ts)
+                loaded[product]['trades'] = store.open_trades(product, self.start_ts, self.end_ts)
+            else:
+                jobs.append((product, 'prices', paths['price_csv']))
+                jobs.append((product, 'trades', paths['trades_csv']))
+        window = (self.start_ts, self.end_ts)
+
+        def collect(result, in_worker):
+            data, progress, hit = result
+            loaded[progress.product][progress.kind] = data
+            if in_worker and hit is not None:
+                self.cache.record(progress.path, hit)
+            if self.progress_callback:
+                self.progress_callback(progress)
+
+        if self.load_workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.load_workers, len(jobs))) as pool:
+                futures = [pool.submit(ingest_file, *job, self.cache, *window) for job in jobs]
+                for future in as_completed(futures):
+                    collect(future.result(), in_worker=True)
+        else:
+            for job in jobs:
+                collect(ingest_file(*job, self.cache, *window), in_worker=False)
+
+        return loaded
 
     def get_mid_price(self, product):
         """Calculate current mid price from orderbook for specific product"""
-        orderbook = self.orderbooks[product]
-        if not orderbook.buy_orders or not orderbook.sell_orders:
+        mid_price = self.orderbooks[product].mid_price
+        if mid_price is None:
             return 10000  # fallback price
+        return mid_price
+
+    def _open_streams(self, product):
+        """Return lazy (price, trade) tuple iterators for a product"""
+        paths = self.product_data_paths[product]
+        window = (self.start_ts, self.end_ts)
+        if 'store' in paths:
+            store = MarketDataStore(paths['store'])
+            return (iter_price_data(store.open_prices(product, *window)),
+                    iter_trade_data(store.open_trades(product, *window)))
+        return iter_price_csv(paths['price_csv'], *window), iter_trades_csv(paths['trades_csv'], *window)
+
+    def stream_ticks(self):
+        """
+        Merge every product's price and trade streams by timestamp (heap-based k-way merge)
+
+        Yields (timestamp, events) where events holds (timestamp, product_index, kind, payload)
+        tuples in file order. Only one pending row per stream is held in memory.
+        """
+        def tag(rows, index, kind):
+            for row in rows:
+                yield row[0], index, kind, (row[1:] if kind == PRICE_EVENT else row)
+
+        streams = []
+        for index, product in enumerate(self.products):
+            price_rows, trade_rows = self._open_streams(product)
+            streams.append(tag(price_rows, index, PRICE_EVENT))
+            streams.append(tag(trade_rows, index, TRADE_EVENT))
 
-        best_bid = max(orderbook.buy_orders.keys())
-        best_ask = min(orderbook.sell_orders.keys())
-        return (best_bid + best_ask) / 2
+        merged = heapq.merge(*streams, key=lambda event: event[0])
+        for ts, events in itertools.groupby(merged, key=lambda event: event[0]):
+            yield ts, list(events)
 
-    def match_orders(self, orders: List[Order], timestamp, max_pos):
-        """Match orders for all products at given timestamp"""
-        # Group orders by product
-        orders_by_product = {}
+    def match_orders(self, orders: List[Order], timestamp, max_pos, market_trades=None) -> List[OrderResult]:
+        """
+        Match orders for all products at given timestamp
+
+        market_trades optionally maps product -> (prices, quantities) lists for this
+        timestamp; by default the prints come from the loaded trade tape. Returns one
+        OrderResult per order, in the order given.
+        """
+        results = []
+        results_by_product = {}
         for order in orders:
-            orders_by_product.setdefault(order.symbol, []).append(order)
+            order_no = None if order.order_id is None else self._order_numbers.get((order.symbol, order.order_id))
+            if order_no is None:
+                order_no = self._next_order_no
+                self._next_order_no += 1
+            result = OrderResult(order, order_no=order_no)
+            results.append(result)
+            results_by_product.setdefault(order.symbol, []).append(result)
         
         # Process orders for each product
-        for product, product_orders in orders_by_product.items():
-            if product not in self.products:
+        for product, product_results in results_by_product.items():
+            if product not in self._product_ids:
                 continue
                 
-            market_trades = self.trades[product].get(timestamp, [])
-            self._match_product_orders(product, product_orders, market_trades, max_pos)
+            if market_trades is None:
+                tape = self.trades[product]
+                lo, hi = tape.at(timestamp)
+                trade_prices = tape.prices[lo:hi].tolist()
+                trade_quantities = tape.quantities[lo:hi].tolist()
+            else:
+                # Matching uses up the prints, so work on a copy of what the trader was shown
+                trade_prices, trade_quantities = market_trades.get(product, ([], []))
+                trade_quantities = list(trade_quantities)
+            self._match_product_orders(product, product_results, trade_prices, trade_quantities, max_pos,
+                                       timestamp)
+
+        return results
 
-    def _match_product_orders(self, product, orders: List[Order], market_trades: List[Trade], max_pos):
-        """Match orders for a specific product"""
+    def _match_product_orders(self, product, results: List[OrderResult], trade_prices, trade_quantities, max_pos,
+                              timestamp):
+        """
+        Match one product's orders for a tick, filling `results` in place
+
+        Orders are matched in submission order, each against the book's levels best
+        first and then the tick's prints in file order. Each side's prices are sorted
+        once per call and its volumes are consumed in the book's own dicts, taken on the
+        first fill. trade_quantities holds the unfilled quantity of each print and is
+        consumed in place; a used-up print is unlinked from the scan, so each order only
+        walks prints with quantity left. Liquidity only shrinks during a call, so once an
+        order is left unfilled at some price, later orders on its side at that price or
+        worse (such as the rest of a run of repeated quotes) are rejected without
+        matching, as are orders priced away from both the best opposite level and every
+        print. Those rejections are counted in match_stats['fast_path'].
+        """
         orderbook = self.orderbooks[product]
-        position_tracker = self.position_trackers[product]
-        
-        for order in orders:
-            qty_to_fill = abs(order.quantity)
-            filled = 0
+        position_tracker = None if self.deferred_pnl else self.position_trackers[product]
+        product_id = self._product_ids[product]
+        position_limit = max_pos or self.POSITION_LIMIT[product]
+        positions, pnls = self.positions, self.pnls
+        logged = []  # fill log rows, handed to the log in one go
+        levels = {}  # side -> (prices best first, price -> volume), taken on first use
+        resting = None  # the book's (buy, sell) dicts once liquidity is consumed
+        # Buy orders (side 1) lift asks at or below their price, sell orders (side -1) hit
+        # bids at or above it; side * price turns both into a <= comparison. dry holds,
+        # per side, the highest side * price already known to find nothing left.
+        dry = {1: -math.inf, -1: -math.inf}
+        first_print = None  # prints with quantity left, linked in file order through next_print
+        if trade_prices:
+            # Lower bounds of side * print price; they stay valid as prints are consumed
+            print_bounds = {1: min(trade_prices), -1: -max(trade_prices)}
+            live = [i for i, quantity in enumerate(trade_quantities) if quantity > 0]
+            if live:
+                first_print = live[0]
+                next_print = [None] * len(trade_prices)
+                for i, j in zip(live, live[1:]):
+                    next_print[i] = j
+        fast_path = 0
+
+        for result in results:
+            order = result.order
+            side = 1 if order.quantity > 0 else -1
 
             # Enforce position limits
-            current_position = self.positions[product]
-            if order.quantity > 0:
-                if max_pos:
-                    max_allowed = max_pos - current_position
-                else:
-                    max_allowed = self.POSITION_LIMIT[product] - current_position
-                if max_allowed <= 0:
-                    continue
-                qty_to_fill = min(qty_to_fill, max_allowed)
+            max_allowed = position_limit - side * positions[product]
+            if max_allowed <= 0:
+                continue
+            qty_to_fill = min(abs(order.quantity), max_allowed)
+
+            limit_price = side * order.price
+            if limit_price <= dry[side]:
+                fast_path += 1
+                continue
+            book = levels.get(side)
+            if book is None and resting is not None:
+                book = levels[side] = _side_levels(orderbook, side)
+
+            # Until liquidity is consumed the best level comes from the book's source row,
+            # so quotes away from the market are rejected without reading the levels
+            if book is None:
+                best = orderbook.best_ask if side > 0 else orderbook.best_bid
             else:
-                if max_pos:
-                    max_allowed = current_position + max_pos
-                else:
-                    max_allowed = current_position + self.POSITION_LIMIT[product]
-                if max_allowed <= 0:
-                    continue
-                qty_to_fill = min(qty_to_fill, max_allowed)
-
-            if order.quantity > 0:
-                # Buy order matching sell orders
-                sell_prices = sorted(p for p in orderbook.sell_orders if p <= order.price)
-                for sp in sell_prices:
-                    avail = orderbook.sell_orders[sp]
-                    fill = min(qty_to_fill - filled, avail)
-                    if fill <= 0:
-                        continue
+                best = book[0][0] if book[0] else None  # possibly exhausted, but no level is better
+            if (best is None or side * best > limit_price) and (not trade_prices or print_bounds[side] > limit_price):
+                dry[side] = limit_price
+                fast_path += 1
+                continue
 
-                    # Update legacy tracking
-                    filled += fill
-                    self.positions[product] += fill
-                    self.pnls[product] -= fill * sp
+            if book is None:
+                book = levels[side] = _side_levels(orderbook, side)
+            prices, volumes = book
 
-                    # Update enhanced tracking
-                    position_tracker.add_trade(fill, sp)
-                    orderbook.sell_orders[sp] -= fill
-                    if orderbook.sell_orders[sp] == 0:
-                        del orderbook.sell_orders[sp]
+            filled = 0
+            for level in prices:
+                if side * level > limit_price or filled == qty_to_fill:
+                    break
+                fill = min(qty_to_fill - filled, volumes.get(level, 0))
+                if fill > 0:
+                    filled += fill
+                    if resting is None:
+                        resting = orderbook.own_orders()
+                    remaining = volumes[level] - fill
+                    if remaining:
+                        resting[0 if side < 0 else 1][level] = remaining
+                    else:
+                        del resting[0 if side < 0 else 1][level]
+                    pnls[product] -= side * fill * level
+                    logged.append((timestamp, product_id, result.order_no, side, level, fill, SOURCE_BOOK))
+                    if position_tracker is not None:
+                        position_tracker.add_trade(side * fill, level)
+                    result.fills.append((level, side * fill))
 
+            # Then market prints at or through the order price, in file order; used-up
+            # prints are unlinked so later orders never scan them again
+            if filled < qty_to_fill and first_print is not None and print_bounds[side] <= limit_price:
+                previous, i = None, first_print
+                while i is not None:
+                    trade_price = trade_prices[i]
+                    if side * trade_price > limit_price:
+                        previous, i = i, next_print[i]
+                        continue
+                    fill = min(qty_to_fill - filled, trade_quantities[i])
+                    filled += fill
+                    trade_quantities[i] -= fill
+                    pnls[product] -= side * fill * trade_price
+                    logged.append((timestamp, product_id, result.order_no, side, trade_price, fill, SOURCE_TAPE))
+                    if position_tracker is not None:
+                        position_tracker.add_trade(side * fill, trade_price)
+                    result.fills.append((trade_price, side * fill))
+                    if trade_quantities[i]:
+                        previous = i
+                    elif previous is None:
+                        first_print = next_print[i]
+                    else:
+                        next_print[previous] = next_print[i]
                     if filled == qty_to_fill:
                         break
+                    i = next_print[i]
 
-                # Match market trades with price <= order price
-                for trade in market_trades[:]:
-                    if trade.price <= order.price and filled < qty_to_fill:
-                        fill = min(qty_to_fill - filled, trade.quantity)
-                        
-                        # Update legacy tracking
-                        filled += fill
-                        self.positions[product] += fill
-                        self.pnls[product] -= fill * trade.price
-
-                        # Update enhanced tracking
-                        position_tracker.add_trade(fill, trade.price)
-                        trade.quantity -= fill
-                        if trade.quantity == 0:
-                            market_trades.remove(trade)
-
-                        if filled == qty_to_fill:
-                            break
+            if filled < qty_to_fill:
+                dry[side] = limit_price
+            positions[product] += side * filled
+            result.filled = side * filled
 
-            else:
-                # Sell order matching buy orders
-                buy_prices = sorted((p for p in orderbook.buy_orders if p >= order.price), reverse=True)
-                for bp in buy_prices:
-                    avail = orderbook.buy_orders[bp]
-                    fill = min(qty_to_fill - filled, avail)
-                    if fill <= 0:
-                        continue
+        if logged:
+            self.fill_log.extend(logged)
+        self.match_stats['orders'] += len(results)
+        self.match_stats['fast_path'] += fast_path
 
-                    # Update legacy tracking
-                    filled += fill
-                    self.positions[product] -= fill
-                    self.pnls[product] += fill * bp
+    def run(self, trader=None):
+        """
+        Run the backtest simulation
 
-                    # Update enhanced tracking
-                    position_tracker.add_trade(-fill, bp)
-                    orderbook.buy_orders[bp] -= fill
-                    if orderbook.buy_orders[bp] == 0:
-                        del orderbook.buy_orders[bp]
+        Can be called again, optionally with another trader: each run starts from a
+        reset() and the data is loaded only once, on the first non-streaming run.
+        Returns the run's FillLog.
+        """
+        if trader is not None:
+            self.trader = trader
+        self.reset()
 
-                    if filled == qty_to_fill:
-                        break
+        if self.streaming:
+            self._run_streaming()
+        else:
+            self._run_loaded()
 
-                # Match market trades with price >= order price
-                for trade in market_trades[:]:
-                    if trade.price >= order.price and filled < qty_to_fill:
-                        fill = min(qty_to_fill - filled, trade.quantity)
-                        
-                        # Update legacy tracking
-                        filled += fill
-                        self.positions[product] -= fill
-                        self.pnls[product] += fill * trade.price
-
-                        # Update enhanced tracking
-                        position_tracker.add_trade(-fill, trade.price)
-                        trade.quantity -= fill
-                        if trade.quantity == 0:
-                            market_trades.remove(trade)
-
-                        if filled == qty_to_fill:
-                            break
-
-    def run(self):
-        """Run the backtest simulation"""
-        self.load_data()
-        
-        # Get all unique timestamps across all products
-        all_timestamps = set()
-        for product in self.products:
-            all_timestamps.update(self.prices[product].keys())
-        
-        timestamps = sorted(all_timestamps)
-        self.timestamps = timestamps
+        if len(self.history):
+            self._auto_clear_positions()
+        if self.deferred_pnl:
+            self._rebuild_histories()
+        self._publish_histories()
+
+        self._print_final_summary()
+        return self.fill_log
+
+    def _run_loaded(self):
+        """Replay every tick after loading all data up front"""
+        if not self.loaded:
+            self.load_data()
+        self.history.reserve(len(self.tick_timestamps) + 1)  # + the auto-clear
+        books = [(self.orderbooks[product], self.prices[product], self.tick_rows[product].tolist())
+                 for product in self.products]
+        tapes = [(product, self.trades[product], self.trades[product].offsets.tolist()) for product in self.products]
 
-        for ts in timestamps:
+        for tick, ts in enumerate(self.tick_timestamps.tolist()):
             # Update orderbooks for all products
+            for orderbook, price_data, rows in books:
+                row = rows[tick]
+                if row >= 0:
+                    orderbook.update_from_arrays(price_data, row)
+                else:
+                    orderbook.hold()
+
+            # Slice this tick's prints straight off the tapes
+            market_trades = {}
+            for product, tape, offsets in tapes:
+                lo, hi = offsets[tick], offsets[tick + 1]
+                if hi > lo:
+                    market_trades[product] = (tape.prices[lo:hi].tolist(), tape.quantities[lo:hi].tolist())
+
+            self._process_tick(ts, market_trades)
+
+    def _run_streaming(self):
+        """Replay ticks as they are merged from the lazily read input files"""
+        for ts, events in self.stream_ticks():
+            market_trades = {}
+            updated = set()
+            for _, index, kind, payload in events:
+                product = self.products[index]
+                if kind == PRICE_EVENT:
+                    self.orderbooks[product].update_from_levels(*payload)
+                    updated.add(product)
+                else:
+                    trade_prices, trade_quantities = market_trades.setdefault(product, ([], []))
+                    trade_prices.append(payload[1])
+                    trade_quantities.append(payload[2])
+
+            # Timestamps with prints but no book update are never simulated
+            if not updated:
+                continue
             for product in self.products:
-                if ts in self.prices[product]:
-                    self.orderbooks[product].update_from_price_row(self.prices[product][ts])
+                if product not in updated:
+                    self.orderbooks[product].hold()
+
+            self._process_tick(ts, market_trades)
+
+    def _process_tick(self, ts, market_trades):
+        """
+        Run the trader, match its orders and record metrics for one timestamp
+
+        market_trades maps product -> (prices, quantities) lists of the prints at ts,
+        with only the products that printed.
+        """
+        self.call_stats['ticks'] += 1
+        row = self.history.add_tick(ts)
+        if self.event_driven and self._last_call is not None:
+            events = set()
+            if any(orderbook.changed for orderbook in self.orderbooks.values()):
+                events.add('book')
+            if market_trades:
+                events.add('trades')
+            if self.state.own_fills:
+                events.add('fills')
+            call_trader = bool(events & self.subscriptions) or (
+                self.heartbeat is not None and ts - self._last_call[0] >= self.heartbeat)
+            if not events and not call_trader:
+                # Nothing moved, so nothing can fill and every metric is unchanged
+                self.call_stats['idle'] += 1
+                self._carry_forward(row)
+                return
+        else:
+            call_trader = True
 
-            # Create state object with all orderbooks
-            state = type("State", (), {})()
+        all_orders = []
+        if call_trader:
+            state = self.state
             state.timestamp = ts
-            state.order_depth = {product: self.orderbooks[product] for product in self.products}
-            state.positions = self.positions
+            state.market_trades = market_trades
 
             # Get orders from trader
             orders_dict, max_pos = self.trader.run(state)
+            self.call_stats['calls'] += 1
+            self._last_call = (ts, max_pos)
             
             # Flatten orders from all products
-            all_orders = []
             for product_orders in orders_dict.values():
                 all_orders.extend(product_orders)
+        else:
+            # Skipped call: resting orders still work under the last limits the trader gave
+            max_pos = self._last_call[1]
 
-            # Match orders
-            self.match_orders(all_orders, ts, max_pos)
+        # Match resting orders that could fill this tick ahead of the one-tick orders
+        immediate, amended = self._apply_amendments(all_orders)
+        resting = self._resting_to_check(max_pos, market_trades, amended)
+        self.last_order_results = self.match_orders(resting + immediate, ts, max_pos, market_trades)
+        self._settle_resting(self.last_order_results[:len(resting)])
+        self.state.own_fills = [result for result in self.last_order_results if result.filled]
 
-            # Calculate and track metrics for each product
-            overall_realized_pnl = 0
-            overall_unrealized_pnl = 0
-            overall_total_pnl = 0
-            
-            for product in self.products:
-                mid_price = self.get_mid_price(product)
-                realized_pnl = self.position_trackers[product].realized_pnl
-                unrealized_pnl = self.position_trackers[product].get_unrealized_pnl(mid_price)
-                total_pnl = realized_pnl + unrealized_pnl
-
-                # Track per-product history
-                self.position_histories[product].append(self.positions[product])
-                self.pnl_histories[product].append(self.pnls[product])
-                self.realized_pnl_histories[product].append(realized_pnl)
-                self.unrealized_pnl_histories[product].append(unrealized_pnl)
-                self.total_pnl_histories[product].append(total_pnl)
-                self.mid_price_histories[product].append(mid_price)
+        self._record_metrics(row)
+
+    def _record_metrics(self, row):
+        """Write every product's position, PnL and mid price into one row of self.history"""
+        history = self.history
+        mids = [self.get_mid_price(product) for product in self.products]
+        history.mid[row] = mids
+        if self.deferred_pnl:
+            # PnL is rebuilt from the fill log after the run; only the marks are needed
+            return
+
+        trackers = [self.position_trackers[product] for product in self.products]
+        realized = [tracker.realized_pnl for tracker in trackers]
+        unrealized = [tracker.get_unrealized_pnl(mid) for tracker, mid in zip(trackers, mids)]
+        history.position[row] = [self.positions[product] for product in self.products]
+        history.pnl[row] = [self.pnls[product] for product in self.products]
+        history.realized[row] = realized
+        history.unrealized[row] = unrealized
+        history.total[row] = totals = [r + u for r, u in zip(realized, unrealized)]
+        history.overall_realized[row] = sum(realized)
+        history.overall_unrealized[row] = sum(unrealized)
+        history.overall_total[row] = sum(totals)
+
+    def _carry_forward(self, row):
+        """Repeat the last recorded metrics for a tick where nothing changed"""
+        self.last_order_results = []
+        self.state.own_fills = []
+        self.history.repeat(row)
+
+    def _apply_amendments(self, orders):
+        """
+        Apply new, replacing and cancelling resting orders
+
+        Returns (orders to match for this tick only, products whose resting orders changed).
+        A replaced order loses its place in the queue.
+        """
+        immediate, amended = [], set()
+        for order in orders:
+            resting = self.resting_orders.get(order.symbol)
+            if isinstance(order, Cancel):
+                if resting is not None and resting.pop(order.order_id, None) is not None:
+                    amended.add(order.symbol)
+            elif order.order_id is None or resting is None:
+                immediate.append(order)
+            else:
+                resting.pop(order.order_id, None)
+                resting[order.order_id] = replace(order)
+                self._order_numbers[order.symbol, order.order_id] = self._next_order_no
+                self._next_order_no += 1
+                amended.add(order.symbol)
+        return immediate, amended
+
+    def _resting_to_check(self, max_pos, market_trades, amended):
+        """
+        Return the resting orders of products where they could fill this tick
+
+        A product's resting orders were left unfilled by the book and prints they were last
+        matched against, so they are only matched again after an amendment, a book update,
+        new prints or a change in position or limits.
+        """
+        orders = []
+        for product, resting in self.resting_orders.items():
+            if not resting:
+                continue
+            limits = (self.positions[product], max_pos)
+            if (product in amended or product in market_trades or self.orderbooks[product].changed
+                    or self._resting_checked.get(product) != limits):
+                self._resting_checked[product] = limits
+                orders.extend(resting.values())
+        return orders
+
+    def _settle_resting(self, results: List[OrderResult]):
+        """Reduce resting orders by their fills and drop the ones that are done"""
+        for result in results:
+            order = result.order
+            if not result.filled and order.quantity:
+                continue
+            resting = self.resting_orders[order.symbol]
+            if order.quantity == result.filled:
+                del resting[order.order_id]
+            else:
+                resting[order.order_id] = replace(order, quantity=order.quantity - result.filled)
+
+    def _auto_clear_positions(self):
+        """Flatten all positions at mid price after the last timestamp"""
+        last_ts = int(self.history.timestamps[len(self.history) - 1])
+        print(f"Auto-clearing all positions at last timestamp {last_ts}")
+        
+        for product in self.products:
+            if self.positions[product] != 0:
+                print(f"Auto-clearing {product} position of {self.positions[product]}")
+                last_mid_price = self.get_mid_price(product)
                 
-                # Accumulate overall metrics
-                overall_realized_pnl += realized_pnl
-                overall_unrealized_pnl += unrealized_pnl
-                overall_total_pnl += total_pnl
-
-            # Track overall history
-            self.overall_realized_pnl_history.append(overall_realized_pnl)
-            self.overall_unrealized_pnl_history.append(overall_unrealized_pnl)
-            self.overall_pnl_history.append(overall_total_pnl)
-
-        # Auto-clear positions at last timestamp
-        if timestamps:
-            last_ts = timestamps[-1]
-            print(f"Auto-clearing all positions at last timestamp {last_ts}")
-            
-            for product in self.products:
-                if self.positions[product] != 0:
-                    print(f"Auto-clearing {product} position of {self.positions[product]}")
-                    last_mid_price = self.get_mid_price(product)
-                    
-                    # Clear position at mid price
+                # Clear position at mid price
+                self.fill_log.append(last_ts + 1, self.products.index(product), -1,
+                                     -1 if self.positions[product] > 0 else 1, last_mid_price,
+                                     abs(self.positions[product]), SOURCE_CLEAR)
+                if not self.deferred_pnl:
                     self.position_trackers[product].add_trade(-self.positions[product], last_mid_price)
-                    self.pnls[product] += (self.positions[product] * last_mid_price 
-                                         if self.positions[product] < 0 
-                                         else -self.positions[product] * last_mid_price)
-                    self.positions[product] = 0
-
-            # Update final history after clearing
-            overall_final_realized = sum(tracker.realized_pnl for tracker in self.position_trackers.values())
-            overall_final_unrealized = sum(tracker.get_unrealized_pnl(self.get_mid_price(product)) 
-                                         for product, tracker in self.position_trackers.items())
-            
-            self.timestamps.append(last_ts + 1)
-            self.overall_realized_pnl_history.append(overall_final_realized)
-            self.overall_unrealized_pnl_history.append(overall_final_unrealized)
-            self.overall_pnl_history.append(overall_final_realized + overall_final_unrealized)
-            
-            for product in self.products:
-                self.position_histories[product].append(0)
-                self.pnl_histories[product].append(self.pnls[product])
-                self.realized_pnl_histories[product].append(self.position_trackers[product].realized_pnl)
-                self.unrealized_pnl_histories[product].append(
-                    self.position_trackers[product].get_unrealized_pnl(self.get_mid_price(product))
-                )
-                self.total_pnl_histories[product].append(
-                    self.position_trackers[product].realized_pnl + 
-                    self.position_trackers[product].get_unrealized_pnl(self.get_mid_price(product))
-                )
-                self.mid_price_histories[product].append(self.get_mid_price(product))
+                self.pnls[product] += (self.positions[product] * last_mid_price 
+                                     if self.positions[product] < 0 
+                                     else -self.positions[product] * last_mid_price)
+                self.positions[product] = 0
 
-        self._print_final_summary()
+        # Record the flat book after clearing
+        self._record_metrics(self.history.add_tick(last_ts + 1))
+
+    def _rebuild_histories(self):
+        """
+        Fill every PnL history from the fill log and the recorded mid prices (deferred_pnl)
+
+        The position trackers are then brought to the state a normal run leaves them in
+        by replaying the product's fills, auto-clear included, in log order.
+        """
+        history = self.history
+        ticks = len(history)
+        fills = self.fill_log.data
+        fill_ticks = np.searchsorted(history.series('timestamps'), fills['timestamp'])
+
+        overall_realized = overall_unrealized = overall_total = 0
+        for product_id, product in enumerate(self.products):
+            mine = fills['product'] == product_id
+            quantities = fills['side'][mine] * fills['quantity'][mine]
+            curves = pnl_curves(fill_ticks[mine], quantities, fills['price'][mine], history.mid[:ticks, product_id])
+            self.accounting[product] = curves
+            history.position[:ticks, product_id] = curves.position
+            history.pnl[:ticks, product_id] = curves.cash
+            if ticks:
+                # The legacy figure ends on self.pnls, which the auto-clear books its own way
+                history.pnl[ticks - 1, product_id] = self.pnls[product]
+            history.realized[:ticks, product_id] = curves.realized
+            history.unrealized[:ticks, product_id] = curves.unrealized
+            history.total[:ticks, product_id] = curves.total
+            overall_realized = overall_realized + curves.realized
+            overall_unrealized = overall_unrealized + curves.unrealized
+            overall_total = overall_total + curves.total
+
+            tracker = self.position_trackers[product]
+            for quantity, price in zip(quantities.tolist(), fills['price'][mine].tolist()):
+                tracker.add_trade(quantity, price)
+
+        history.overall_realized[:ticks] = overall_realized
+        history.overall_unrealized[:ticks] = overall_unrealized
+        history.overall_total[:ticks] = overall_total
 
     def _print_final_summary(self):
         """Print comprehensive final summary"""
@@ -461,20 +1114,27 @@ class MultiProductBacktester:
         print("MULTI-PRODUCT BACKTEST SUMMARY")
         print("="*80)
         
-        overall_realized = self.overall_realized_pnl_history[-1] if self.overall_realized_pnl_history else 0
-        overall_total = self.overall_pnl_history[-1] if self.overall_pnl_history else 0
+        overall_realized = self.overall_realized_pnl_history[-1] if len(self.overall_realized_pnl_history) else 0
+        overall_total = self.overall_pnl_history[-1] if len(self.overall_pnl_history) else 0
         
         print(f"\n OVERALL PERFORMANCE:")
         print(f"├── Total Realized PnL: ${overall_realized:.2f}")
         print(f"└── Total PnL: ${overall_total:.2f}")
+
+        if self.event_driven:
+            stats = self.call_stats
+            saved = 100 * (1 - stats['calls'] / stats['ticks']) if stats['ticks'] else 0
+            print(f"\n TRADER CALLS (event-driven):")
+            print(f"├── Called on {stats['calls']} of {stats['ticks']} ticks ({saved:.1f}% fewer calls)")
+            print(f"└── Idle ticks carried forward: {stats['idle']}")
         
         print(f"\n PER-PRODUCT BREAKDOWN:")
         for product in self.products:
             final_pos = self.positions[product]
             final_realized = (self.realized_pnl_histories[product][-1] 
-                            if self.realized_pnl_histories[product] else 0)
+                            if len(self.realized_pnl_histories[product]) else 0)
             final_total = (self.total_pnl_histories[product][-1] 
-                         if self.total_pnl_histories[product] else 0)
+                         if len(self.total_pnl_histories[product]) else 0)
             
             print(f"├── {product}:")
             print(f"│   ├── Final Position: {final_pos}")
@@ -483,7 +1143,7 @@ class MultiProductBacktester:
 
     def get_detailed_summary(self):
         """Get detailed trading summary with per-product breakdown"""
-        if not self.timestamps:
+        if not len(self.timestamps):
             return "No trading data available"
 
         summary = "\n" + "="*80 + "\n"
@@ -491,26 +1151,33 @@ class MultiProductBacktester:
         summary += "="*80 + "\n"
 
         # Overall metrics
-        overall_realized = self.overall_realized_pnl_history[-1] if self.overall_realized_pnl_history else 0
-        overall_total = self.overall_pnl_history[-1] if self.overall_pnl_history else 0
+        overall_realized = self.overall_realized_pnl_history[-1] if len(self.overall_realized_pnl_history) else 0
+        overall_total = self.overall_pnl_history[-1] if len(self.overall_pnl_history) else 0
         
         summary += f"\n OVERALL PERFORMANCE:\n"
         summary += f"├── Total Realized PnL: ${overall_realized:.2f}\n"
         summary += f"├── Total PnL: ${overall_total:.2f}\n"
         summary += f"└── Products Traded: {len(self.products)}\n"
 
+        if self.event_driven:
+            stats = self.call_stats
+            saved = 100 * (1 - stats['calls'] / stats['ticks']) if stats['ticks'] else 0
+            summary += f"\n TRADER CALLS (event-driven):\n"
+            summary += f"├── Called on {stats['calls']} of {stats['ticks']} ticks ({saved:.1f}% fewer calls)\n"
+            summary += f"└── Idle ticks carried forward: {stats['idle']}\n"
+
         # Per-product breakdown
         summary += f"\n DETAILED PER-PRODUCT ANALYSIS:\n"
         for i, product in enumerate(self.products):
             final_pos = self.positions[product]
             final_realized = (self.realized_pnl_histories[product][-1] 
-                            if self.realized_pnl_histories[product] else 0)
+                            if len(self.realized_pnl_histories[product]) else 0)
             final_total = (self.total_pnl_histories[product][-1] 
-                         if self.total_pnl_histories[product] else 0)
+                         if len(self.total_pnl_histories[product]) else 0)
             max_realized = (max(self.realized_pnl_histories[product]) 
-                          if self.realized_pnl_histories[product] else 0)
+                          if len(self.realized_pnl_histories[product]) else 0)
             min_realized = (min(self.realized_pnl_histories[product]) 
-                          if self.realized_pnl_histories[product] else 0)
+                          if len(self.realized_pnl_histories[product]) else 0)
             
             connector = "├──" if i < len(self.products) - 1 else "└──"
             sub_connector = "│" if i < len(self.products) - 1 else " "
@@ -528,14 +1195,14 @@ class MultiProductBacktester:
 class Backtester(MultiProductBacktester):
     """Single-product backtester for backward compatibility"""
     
-    def __init__(self, price_csv_path, trades_csv_path, trader):
+    def __init__(self, price_csv_path, trades_csv_path, trader, cache: ParsedDataCache = None, **kwargs):
         product_data = {
             "PRODUCT": {
                 "price_csv": price_csv_path,
                 "trades_csv": trades_csv_path
             }
         }
-        super().__init__(product_data, trader)
+        super().__init__(product_data, trader, cache, **kwargs)
         
         # Legacy properties for backward compatibility
         self.price_csv_path = price_csv_path
@@ -0,0 +1,166 @@
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+from .marketdata import CACHE_DIR_NAME, COMPRESSED_OPENERS, content_hash, open_binary
+
+MANIFEST_FILE = "catalog.json"
+FILE_KINDS = {"price": "prices", "prices": "prices", "trade": "trades", "trades": "trades"}
+
+
+@dataclass
+class FileInfo:
+    """Summary of one data file as recorded in a root's manifest"""
+    path: str
+    size: int
+    mtime_ns: int
+    fingerprint: str
+    rows: int
+    first_ts: int = None
+    last_ts: int = None
+
+
+@dataclass
+class CatalogEntry:
+    """A product's price and trades files"""
+    product: str
+    prices: FileInfo
+    trades: FileInfo
+
+    @property
+    def first_ts(self):
+        return self.prices.first_ts
+
+    @property
+    def last_ts(self):
+        return self.prices.last_ts
+
+    def data_paths(self):
+        return {'price_csv': self.prices.path, 'trades_csv': self.trades.path}
+
+
+def classify_file(name):
+    """Return (product, kind) for a data file name like `prices_ash.csv` or `abra_price.csv.gz`"""
+    stem = name.lower()
+    for suffix in COMPRESSED_OPENERS:
+        if stem.endswith(suffix):
+            stem = stem[:-len(suffix)]
+    if not stem.endswith(".csv"):
+        return None, None
+    tokens = stem[:-len(".csv")].split("_")
+    kinds = [FILE_KINDS[token] for token in tokens if token in FILE_KINDS]
+    if len(kinds) != 1:
+        return None, None
+    product = "_".join(token for token in tokens if token not in FILE_KINDS).upper()
+    return product or None, kinds[0]
+
+
+def scan_file(path):
+    """Read a data file once for its row count and first/last timestamps"""
+    stat = os.stat(path)
+    rows, first_ts, last_line = 0, None, b""
+    with open_binary(path) as f:
+        header = f.readline().decode().strip().split(",")
+        ts_col = header.index("timestamp") if "timestamp" in header else 0
+        for line in f:
+            if not line.strip():
+                continue
+            if first_ts is None:
+                first_ts = int(line.split(b",")[ts_col])
+            rows += 1
+            last_line = line
+    last_ts = int(last_line.split(b",")[ts_col]) if rows else None
+    return FileInfo(os.path.abspath(path), stat.st_size, stat.st_mtime_ns, content_hash(path),
+                    rows, first_ts, last_ts)
+
+
+class DataCatalog:
+    """
+    Discovers product data under one or more roots and records it in a manifest
+
+    A root may hold one directory per product (`ASH/prices_ash.csv`, ...) or flat
+    files named `<product>_price(s).csv` / `prices_<product>.csv`; compressed
+    variants are found too. Each root keeps a manifest in its CACHE_DIR_NAME folder
+    so later scans only re-read files whose size or mtime changed. When a product
+    appears under several roots the first root wins.
+    """
+
+    def __init__(self, roots):
+        self.roots = [roots] if isinstance(roots, str) else list(roots)
+        self.entries: Dict[str, CatalogEntry] = {}
+
+    def scan(self):
+        """Scan every root and rebuild the product list"""
+        self.entries = {}
+        for root in self.roots:
+            for product, files in self._scan_root(root).items():
+                if product not in self.entries and 'prices' in files and 'trades' in files:
+                    self.entries[product] = CatalogEntry(product, files['prices'], files['trades'])
+        return self.entries
+
+    def products(self) -> List[str]:
+        if not self.entries:
+            self.scan()
+        return sorted(self.entries)
+
+    def entry(self, product) -> CatalogEntry:
+        if not self.entries:
+            self.scan()
+        return self.entries[product]
+
+    def data_paths(self, products=None):
+        """Return {product: {'price_csv': path, 'trades_csv': path}} for MultiProductBacktester"""
+        products = self.products() if products is None else products
+        return {product: self.entry(product).data_paths() for product in products}
+
+    def manifest(self):
+        """Return the catalog as plain data, e.g. for display or json.dump"""
+        if not self.entries:
+            self.scan()
+        return {product: asdict(entry) for product, entry in sorted(self.entries.items())}
+
+    def _scan_root(self, root):
+        manifest_path = os.path.join(root, CACHE_DIR_NAME, MANIFEST_FILE)
+        try:
+            with open(manifest_path) as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = {}
+
+        found = {}
+        for product, kind, path in self._discover(root):
+            stat = os.stat(path)
+            cached = previous.get(path)
+            if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+                info = FileInfo(**cached)
+            else:
+                info = scan_file(path)
+            found.setdefault(product, {}).setdefault(kind, info)
+
+        manifest = {info.path: asdict(info) for files in found.values() for info in files.values()}
+        if manifest != previous:
+            os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+            with open(manifest_path, "w") as f:
+                json.dump(manifest, f, indent=1)
+        return found
+
+    @staticmethod
+    def _discover(root):
+        """Yield (product, kind, absolute path) for every recognised data file under root"""
+        if not os.path.isdir(root):
+            return
+        for name in sorted(os.listdir(root)):
+            path = os.path.abspath(os.path.join(root, name))
+            if os.path.isdir(path):
+                if name.startswith("."):
+                    continue
+                for child in sorted(os.listdir(path)):
+                    _, kind = classify_file(child)
+                    if kind:
+                        yield name.upper(), kind, os.path.join(path, child)
+            else:
+                # A flat file has to name its product; a bare prices.csv has no product to file it under
+                product, kind = classify_file(name)
+                if kind and product:
+                    yield product, kind, path
@@ -0,0 +1,76 @@
+from typing import Dict
+
+import numpy as np
+
+# Per-product series, each a (ticks, products) array
+PRODUCT_SERIES = {
+    "position": np.int32,
+    "pnl": np.float64,  # legacy cash-flow PnL
+    "realized": np.float64,
+    "unrealized": np.float64,
+    "total": np.float64,
+    "mid": np.float64,
+}
+# Series summed over products, each a (ticks,) array
+OVERALL_SERIES = ("overall_realized", "overall_unrealized", "overall_total")
+
+
+class RunHistory:
+    """
+    Per-tick metrics of a run in preallocated NumPy arrays
+
+    Every simulated tick claims one row with add_tick() and the backtester writes that
+    row in place, so recording a tick allocates nothing. When the tick count is known up
+    front reserve() sizes the arrays once; otherwise they double when full. The
+    backtester's `*_histories` attributes are column views trimmed to len(self).
+    """
+
+    def __init__(self, products, capacity=1024):
+        self.products = list(products)
+        self._size = 0
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        for name, dtype in PRODUCT_SERIES.items():
+            setattr(self, name, np.zeros((capacity, len(self.products)), dtype=dtype))
+        for name in OVERALL_SERIES:
+            setattr(self, name, np.zeros(capacity))
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self.timestamps)
+
+    def reserve(self, capacity):
+        """Make room for at least `capacity` ticks"""
+        if capacity <= self.capacity:
+            return
+        for name in ("timestamps", *PRODUCT_SERIES, *OVERALL_SERIES):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def add_tick(self, ts) -> int:
+        """Claim the row for the next tick and return its index"""
+        if self._size == self.capacity:
+            self.reserve(2 * self.capacity)
+        row = self._size
+        self.timestamps[row] = ts
+        self._size += 1
+        return row
+
+    def repeat(self, row):
+        """Copy every metric of the previous row into `row` (a tick where nothing changed)"""
+        for name in (*PRODUCT_SERIES, *OVERALL_SERIES):
+            series = getattr(self, name)
+            series[row] = series[row - 1]
+
+    def series(self, name) -> np.ndarray:
+        """The recorded rows of one series"""
+        return getattr(self, name)[:self._size]
+
+    def by_product(self, name) -> Dict[str, np.ndarray]:
+        """{product: recorded values} views of one per-product series"""
+        series = self.series(name)
+        return {product: series[:, column] for column, product in enumerate(self.products)}
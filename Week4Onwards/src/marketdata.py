@@ -0,0 +1,794 @@
+import bz2
+import csv
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import os
+import time
+from dataclasses import dataclass, fields
+from typing import Dict
+
+import numpy as np
+
+PRICE_LEVELS = 3
+EMPTY_LEVEL = -1  # price sentinel for a level that is missing from the snapshot
+
+PRICE_FIELDS = ("bid_price", "bid_volume", "ask_price", "ask_volume")
+PRICE_COLUMNS = ["timestamp"] + [
+    f"{side}_{field}_{level}"
+    for side in ("bid", "ask")
+    for level in range(1, PRICE_LEVELS + 1)
+    for field in ("price", "volume")
+]
+TRADE_COLUMNS = ["timestamp", "price", "quantity"]
+CACHE_DIR_NAME = ".backtest_cache"
+STORE_META_FILE = "meta.json"
+INDEX_STRIDE = 256  # rows between entries of a CSV seek index
+COMPRESSED_OPENERS = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+
+
+@dataclass
+class PriceData:
+    """Columnar order book snapshots for one product
+
+    Level fields are (rows, PRICE_LEVELS) int64 arrays; column i holds level i + 1.
+    Missing prices are EMPTY_LEVEL and missing volumes are 0.
+    """
+    timestamps: np.ndarray
+    bid_prices: np.ndarray
+    bid_volumes: np.ndarray
+    ask_prices: np.ndarray
+    ask_volumes: np.ndarray
+
+    # Set by validate_price_data when every row is sorted, unique, uncrossed and has
+    # contiguous non-empty levels on both sides, with no price repeated within a side;
+    # bid_level_counts/ask_level_counts then hold the number of populated levels per row.
+    clean = False
+    bid_level_counts = None
+    ask_level_counts = None
+    _top_of_book = None
+    _changes = None
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def top_of_book(self):
+        """Return per-row (best_bid, best_ask) int64 arrays, EMPTY_LEVEL where a side is empty; computed once"""
+        if self._top_of_book is None:
+            bid_prices, ask_prices = np.asarray(self.bid_prices), np.asarray(self.ask_prices)
+            has_bid = (bid_prices != EMPTY_LEVEL).any(axis=1)
+            has_ask = (ask_prices != EMPTY_LEVEL).any(axis=1)
+            best_bid = np.where(bid_prices == EMPTY_LEVEL, np.iinfo(np.int64).min, bid_prices).max(axis=1)
+            best_ask = np.where(ask_prices == EMPTY_LEVEL, np.iinfo(np.int64).max, ask_prices).min(axis=1)
+            self._top_of_book = (_read_only(np.where(has_bid, best_bid, EMPTY_LEVEL)),
+                                 _read_only(np.where(has_ask, best_ask, EMPTY_LEVEL)))
+        return self._top_of_book
+
+    def change_mask(self):
+        """Return a (rows, 2 * PRICE_LEVELS) bool array (bid levels, then ask levels) set where a
+        level's price or volume differs from the previous row; the first row is all set"""
+        return self._level_changes()[0]
+
+    def changed_rows(self):
+        """Return a per-row bool array set where any level differs from the previous row"""
+        return self._level_changes()[1]
+
+    def _level_changes(self):
+        if self._changes is None:
+            mask = np.ones((len(self), 2 * PRICE_LEVELS), dtype=bool)
+            for offset, (prices, volumes) in enumerate(((self.bid_prices, self.bid_volumes),
+                                                        (self.ask_prices, self.ask_volumes))):
+                levels = slice(offset * PRICE_LEVELS, (offset + 1) * PRICE_LEVELS)
+                mask[1:, levels] = (prices[1:] != prices[:-1]) | (volumes[1:] != volumes[:-1])
+            self._changes = (_read_only(mask), _read_only(mask.any(axis=1)))
+        return self._changes
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Return the data keyed by the CSV column names"""
+        columns = {"timestamp": self.timestamps}
+        for field in PRICE_FIELDS:
+            values = getattr(self, field + "s")
+            for i in range(PRICE_LEVELS):
+                columns[f"{field}_{i + 1}"] = values[:, i]
+        return columns
+
+    def window(self, start_ts=None, end_ts=None) -> "PriceData":
+        """Rows with start_ts <= timestamp <= end_ts: a zero-copy view when timestamps are sorted, else a copy"""
+        rows = _window_rows(self.timestamps, start_ts, end_ts)
+        return PriceData(*(getattr(self, f.name)[rows] for f in fields(self)))
+
+
+@dataclass
+class TradeData:
+    """Columnar market trade prints for one product"""
+    timestamps: np.ndarray
+    prices: np.ndarray
+    quantities: np.ndarray
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Return the data keyed by the CSV column names"""
+        return {"timestamp": self.timestamps, "price": self.prices, "quantity": self.quantities}
+
+    def window(self, start_ts=None, end_ts=None) -> "TradeData":
+        """Prints with start_ts <= timestamp <= end_ts: a zero-copy view when timestamps are sorted, else a copy"""
+        rows = _window_rows(self.timestamps, start_ts, end_ts)
+        return TradeData(*(getattr(self, f.name)[rows] for f in fields(self)))
+
+
+@dataclass
+class TradeTape:
+    """
+    Trade prints packed in compressed-sparse-row form over a run's tick timestamps
+
+    The prints of tick i are prices[offsets[i]:offsets[i + 1]] (and the same slice of
+    quantities), in file order. Prints at timestamps that are not ticks are dropped.
+    """
+    timestamps: np.ndarray
+    offsets: np.ndarray
+    prices: np.ndarray
+    quantities: np.ndarray
+
+    @classmethod
+    def from_trades(cls, trades: TradeData, timestamps, aggregate=False) -> "TradeTape":
+        """
+        Pack `trades` against the sorted, unique tick `timestamps`
+
+        With aggregate=True, prints at the same tick and price are merged into the
+        first of them. Fill totals per price are unchanged but a partially filled
+        order may then take a different mix of prices.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        order = np.argsort(trades.timestamps, kind="stable")
+        trade_ts = np.asarray(trades.timestamps)[order]
+        prices = np.asarray(trades.prices)[order]
+        quantities = np.asarray(trades.quantities)[order]
+
+        rows = np.searchsorted(timestamps, trade_ts)
+        on_tick = rows < len(timestamps)
+        on_tick[on_tick] = timestamps[rows[on_tick]] == trade_ts[on_tick]
+        rows, prices, quantities = rows[on_tick], prices[on_tick], quantities[on_tick]
+
+        if aggregate and len(rows):
+            keys = np.stack([rows, prices], axis=1)
+            _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            totals = np.bincount(inverse, weights=quantities).astype(np.int64)
+            keep = np.argsort(first, kind="stable")  # groups in order of their first print
+            rows, prices, quantities = rows[first[keep]], prices[first[keep]], totals[keep]
+
+        offsets = np.zeros(len(timestamps) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(timestamps)), out=offsets[1:])
+        return cls(timestamps, offsets, np.ascontiguousarray(prices), np.ascontiguousarray(quantities))
+
+    def __len__(self):
+        return len(self.prices)
+
+    def tick_bounds(self, tick):
+        """Slice bounds of the prints at tick row `tick`"""
+        return int(self.offsets[tick]), int(self.offsets[tick + 1])
+
+    def at(self, timestamp):
+        """Slice bounds of the prints at `timestamp`, empty if it is not a tick"""
+        tick = int(np.searchsorted(self.timestamps, timestamp))
+        if tick == len(self.timestamps) or self.timestamps[tick] != timestamp:
+            return 0, 0
+        return self.tick_bounds(tick)
+
+
+@dataclass
+class ValidationReport:
+    """Problems found by validate_price_data or validate_trade_data, as offending row indices"""
+    rows: int
+    issues: Dict[str, np.ndarray]
+    repaired: bool = False
+
+    @property
+    def ok(self):
+        return not any(len(rows) for rows in self.issues.values())
+
+    def counts(self):
+        return {name: len(rows) for name, rows in self.issues.items()}
+
+    def summary(self):
+        found = [f"{name}={count}" for name, count in self.counts().items() if count]
+        status = "repaired" if self.repaired and found else ("clean" if not found else "issues")
+        return f"{self.rows} rows, {status}" + (f": {', '.join(found)}" if found else "")
+
+
+def _timestamp_issues(timestamps):
+    issues = {"non_monotonic_timestamps": np.flatnonzero(np.diff(timestamps) < 0) + 1}
+    _, first = np.unique(timestamps, return_index=True)
+    duplicate = np.ones(len(timestamps), dtype=bool)
+    duplicate[first] = False
+    issues["duplicate_timestamps"] = np.flatnonzero(duplicate)
+    return issues
+
+
+def _sort_keep_last(timestamps):
+    """Row order that sorts by timestamp and keeps the last row of each duplicate run"""
+    order = np.argsort(timestamps, kind="stable")
+    sorted_ts = timestamps[order]
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = sorted_ts[1:] != sorted_ts[:-1]
+    return order[last]
+
+
+def _book_checks(bid_prices, ask_prices):
+    """Return (bid_present, ask_present, has_both_sides, best_bid, best_ask)"""
+    lowest, highest = np.iinfo(np.int64).min, np.iinfo(np.int64).max
+    bid_present = bid_prices != EMPTY_LEVEL
+    ask_present = ask_prices != EMPTY_LEVEL
+    best_bid = np.where(bid_present, bid_prices, lowest).max(axis=1, initial=lowest)
+    best_ask = np.where(ask_present, ask_prices, highest).min(axis=1, initial=highest)
+    has_both = bid_present.any(axis=1) & ask_present.any(axis=1)
+    return bid_present, ask_present, has_both, best_bid, best_ask
+
+
+def _repeated_levels(prices):
+    """Mask of populated levels whose price appears again on a later level of the same row"""
+    repeated = np.zeros(prices.shape, dtype=bool)
+    for level in range(prices.shape[1] - 1):
+        later = (prices[:, level + 1:] == prices[:, level:level + 1]).any(axis=1)
+        repeated[:, level] = (prices[:, level] != EMPTY_LEVEL) & later
+    return repeated
+
+
+def _mark_clean(data: PriceData):
+    data.clean = True
+    data.bid_level_counts = _read_only((np.asarray(data.bid_prices) != EMPTY_LEVEL).sum(axis=1, dtype=np.int8))
+    data.ask_level_counts = _read_only((np.asarray(data.ask_prices) != EMPTY_LEVEL).sum(axis=1, dtype=np.int8))
+    return data
+
+
+def validate_price_data(data: PriceData, repair=False):
+    """
+    Check book snapshots once, vectorised, and optionally repair them
+
+    Detects non-monotonic and duplicate timestamps, crossed (bid > ask) and locked
+    (bid == ask) books, snapshots missing a whole side, gaps between levels, levels
+    with a non-positive volume and prices repeated on two levels of one side. Repair
+    sorts by timestamp keeping the last duplicate (as the backtester does), drops
+    non-positive-volume levels, keeps only the last level of a repeated price (the
+    one a price -> volume dict ends up with), closes level gaps, and replaces
+    one-sided, crossed or locked rows with the previous good snapshot; leading bad
+    rows are dropped. Returns (data, ValidationReport); the returned data is marked
+    clean when it passed or was repaired.
+    """
+    timestamps = np.asarray(data.timestamps)
+    bid_prices, ask_prices = np.asarray(data.bid_prices), np.asarray(data.ask_prices)
+    bid_volumes, ask_volumes = np.asarray(data.bid_volumes), np.asarray(data.ask_volumes)
+
+    issues = _timestamp_issues(timestamps)
+    bid_present, ask_present, has_both, best_bid, best_ask = _book_checks(bid_prices, ask_prices)
+    issues["crossed_book"] = np.flatnonzero(has_both & (best_bid > best_ask))
+    issues["locked_book"] = np.flatnonzero(has_both & (best_bid == best_ask))
+    issues["empty_side"] = np.flatnonzero(~has_both)
+    gaps = ((bid_present[:, 1:] & ~bid_present[:, :-1]).any(axis=1)
+            | (ask_present[:, 1:] & ~ask_present[:, :-1]).any(axis=1))
+    issues["missing_levels"] = np.flatnonzero(gaps)
+    zero_volume = (bid_present & (bid_volumes <= 0)).any(axis=1) | (ask_present & (ask_volumes <= 0)).any(axis=1)
+    issues["zero_volume"] = np.flatnonzero(zero_volume)
+    issues["repeated_price"] = np.flatnonzero(_repeated_levels(bid_prices).any(axis=1)
+                                              | _repeated_levels(ask_prices).any(axis=1))
+    report = ValidationReport(len(timestamps), issues)
+
+    if report.ok:
+        return _mark_clean(data), report
+    if not repair:
+        return data, report
+
+    keep = _sort_keep_last(timestamps)
+    timestamps = timestamps[keep]
+    sides = []
+    for prices, volumes in ((bid_prices[keep], bid_volumes[keep]), (ask_prices[keep], ask_volumes[keep])):
+        present = (prices != EMPTY_LEVEL) & (volumes > 0)
+        present &= ~_repeated_levels(np.where(present, prices, EMPTY_LEVEL))
+        prices = np.where(present, prices, EMPTY_LEVEL)
+        volumes = np.where(present, volumes, 0)
+        compact = np.argsort(~present, axis=1, kind="stable")  # populated levels first, order kept
+        sides.append((np.take_along_axis(prices, compact, axis=1), np.take_along_axis(volumes, compact, axis=1)))
+    (bid_prices, bid_volumes), (ask_prices, ask_volumes) = sides
+
+    # Bad snapshots are replaced by the last good one; leading bad rows have none
+    _, _, has_both, best_bid, best_ask = _book_checks(bid_prices, ask_prices)
+    good = has_both & (best_bid < best_ask)
+    source = np.maximum.accumulate(np.where(good, np.arange(len(good)), -1)) if len(good) else good.astype(np.int64)
+    rows = source >= 0
+    source = source[rows]
+
+    repaired = PriceData(
+        timestamps=np.ascontiguousarray(timestamps[rows]),
+        bid_prices=np.ascontiguousarray(bid_prices[source]),
+        bid_volumes=np.ascontiguousarray(bid_volumes[source]),
+        ask_prices=np.ascontiguousarray(ask_prices[source]),
+        ask_volumes=np.ascontiguousarray(ask_volumes[source]),
+    )
+    report.repaired = True
+    return _mark_clean(repaired), report
+
+
+def validate_trade_data(data: TradeData, repair=False):
+    """
+    Check trade prints once and optionally repair them
+
+    Detects non-monotonic timestamps and non-positive prices or quantities. Repair
+    sorts by timestamp (stable, so prints keep their order within a timestamp) and
+    drops the bad prints. Returns (data, ValidationReport).
+    """
+    timestamps = np.asarray(data.timestamps)
+    prices, quantities = np.asarray(data.prices), np.asarray(data.quantities)
+    issues = {
+        "non_monotonic_timestamps": np.flatnonzero(np.diff(timestamps) < 0) + 1,
+        "bad_price": np.flatnonzero(prices <= 0),
+        "bad_quantity": np.flatnonzero(quantities <= 0),
+    }
+    report = ValidationReport(len(timestamps), issues)
+    if report.ok or not repair:
+        return data, report
+
+    order = np.argsort(timestamps, kind="stable")
+    order = order[(prices[order] > 0) & (quantities[order] > 0)]
+    report.repaired = True
+    return TradeData(timestamps[order], prices[order], quantities[order]), report
+
+
+def _is_sorted(timestamps):
+    return bool(np.all(timestamps[1:] >= timestamps[:-1]))
+
+
+def _window_rows(timestamps, start_ts, end_ts):
+    """Rows with start_ts <= timestamp <= end_ts: a slice when timestamps are sorted, else a boolean mask"""
+    if start_ts is None and end_ts is None:
+        return slice(None)
+    if not _is_sorted(timestamps):
+        mask = np.ones(len(timestamps), dtype=bool)
+        if start_ts is not None:
+            mask &= timestamps >= start_ts
+        if end_ts is not None:
+            mask &= timestamps <= end_ts
+        return mask
+    lo = 0 if start_ts is None else int(np.searchsorted(timestamps, start_ts, side="left"))
+    hi = len(timestamps) if end_ts is None else int(np.searchsorted(timestamps, end_ts, side="right"))
+    return slice(lo, max(lo, hi))
+
+
+def align_timestamps(timestamp_arrays):
+    """
+    Put several timestamp columns on one tick axis
+
+    Returns (ticks, rows): the sorted union of every column, and for each column an
+    int64 array with the row shown at each tick, or -1 where that column has no row.
+    Columns need not be sorted; on duplicate timestamps the later row wins, as when a
+    snapshot overwrites the book.
+    """
+    timestamp_arrays = [np.asarray(timestamps, dtype=np.int64) for timestamps in timestamp_arrays]
+    # np.union1d of all the columns at once: one sort instead of one per column
+    ticks = np.unique(np.concatenate([np.zeros(0, dtype=np.int64)] + timestamp_arrays))
+
+    rows = []
+    for timestamps in timestamp_arrays:
+        order = _sort_keep_last(timestamps)
+        tick_rows = np.full(len(ticks), -1, dtype=np.int64)
+        tick_rows[np.searchsorted(ticks, timestamps[order])] = order
+        rows.append(tick_rows)
+    return ticks, rows
+
+
+def _read_only(values):
+    values.flags.writeable = False
+    return values
+
+
+def freeze(data):
+    """Make every array of a PriceData, TradeData or TradeTape read-only; returns `data`"""
+    for f in fields(data):
+        values = getattr(data, f.name)
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+    return data
+
+
+def _sidecar_path(path, cache_dir, suffix):
+    """Location of a derived file for `path`, in cache_dir or a CACHE_DIR_NAME folder next to it"""
+    path = os.path.abspath(path)
+    cache_dir = cache_dir or os.path.join(os.path.dirname(path), CACHE_DIR_NAME)
+    key = hashlib.blake2b(path.encode(), digest_size=8).hexdigest()
+    return os.path.join(cache_dir, f"{os.path.basename(path)}.{key}{suffix}")
+
+
+def is_compressed(path):
+    return os.path.splitext(path)[1].lower() in COMPRESSED_OPENERS
+
+
+def open_binary(path):
+    """Open a CSV for binary reading, decompressing .gz/.xz/.bz2 files as they are read"""
+    opener = COMPRESSED_OPENERS.get(os.path.splitext(path)[1].lower(), open)
+    return opener(path, "rb")
+
+
+def build_csv_index(path, stride=INDEX_STRIDE):
+    """
+    Scan a timestamp-sorted CSV and return (timestamps, byte_offsets) for every stride-th row
+
+    Raises ValueError if the file is not sorted by timestamp.
+    """
+    timestamps, offsets = [], []
+    with open(path, "rb") as f:
+        header = f.readline()
+        ts_col = header.decode().strip().split(",").index("timestamp")
+        offset = len(header)
+        previous = None
+        for row, line in enumerate(f):
+            if line.strip():
+                ts = int(line.split(b",", ts_col + 1)[ts_col])
+                if previous is not None and ts < previous:
+                    raise ValueError(f"{path} is not sorted by timestamp")
+                if row % stride == 0:
+                    timestamps.append(ts)
+                    offsets.append(offset)
+                previous = ts
+            offset += len(line)
+    return np.array(timestamps, dtype=np.int64), np.array(offsets, dtype=np.int64)
+
+
+def load_csv_index(path, cache_dir=None):
+    """Return the seek index for `path`, rebuilding its sidecar file when the CSV changed"""
+    index_path = _sidecar_path(path, cache_dir, ".idx.npz")
+    stat = os.stat(path)
+    if os.path.exists(index_path):
+        try:
+            with np.load(index_path) as index:
+                if int(index["size"]) == stat.st_size and int(index["mtime_ns"]) == stat.st_mtime_ns:
+                    return index["timestamps"], index["offsets"]
+        except (OSError, KeyError, ValueError):
+            pass  # unreadable sidecar; rebuild it below
+
+    timestamps, offsets = build_csv_index(path)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    tmp = index_path + ".tmp.npz"
+    np.savez(tmp, size=stat.st_size, mtime_ns=stat.st_mtime_ns, timestamps=timestamps, offsets=offsets)
+    os.replace(tmp, index_path)
+    return timestamps, offsets
+
+
+def _fit_rows(rows, width):
+    """Skip blank rows and pad or trim the others to `width` cells, as csv.DictReader does"""
+    padding = [''] * width
+    for row in rows:
+        if len(row) != width:
+            if not row:
+                continue
+            row = (row + padding)[:width]
+        yield row
+
+
+def _csv_rows(path, start_ts=None, end_ts=None):
+    """
+    Yield the header and then every row with start_ts <= timestamp <= end_ts
+
+    Rows are padded or trimmed to the header width, so a row missing its trailing
+    empty cells still lines up. With a window, a plain file is checked for sort order
+    through its seek index and reading starts at the last indexed row before start_ts.
+    Compressed files cannot seek, so they are decompressed from the start and filtered.
+    """
+    with open_binary(path) as f:
+        header = next(csv.reader([f.readline().decode()]), [])
+        yield header
+        if start_ts is None and end_ts is None:
+            yield from _fit_rows(csv.reader(io.TextIOWrapper(f, newline='')), len(header))
+            return
+
+        timestamps, offsets = load_csv_index(path) if not is_compressed(path) else ([], [])
+        if start_ts is not None and len(timestamps):
+            entry = int(np.searchsorted(timestamps, start_ts, side="left")) - 1
+            f.seek(int(offsets[max(entry, 0)]))
+
+        ts_col = header.index("timestamp")
+        for row in _fit_rows(csv.reader(io.TextIOWrapper(f, newline='')), len(header)):
+            ts = int(row[ts_col])
+            if start_ts is not None and ts < start_ts:
+                continue
+            if end_ts is not None and ts > end_ts:
+                break
+            yield row
+
+
+def _read_int_table(path, columns, start_ts=None, end_ts=None):
+    """Parse a CSV into an int64 table ordered like `columns`; empty cells become EMPTY_LEVEL"""
+    rows = _csv_rows(path, start_ts, end_ts)
+    header = next(rows)
+    values = [int(v) if v else EMPTY_LEVEL for row in rows for v in row]
+
+    table = np.array(values, dtype=np.int64).reshape(-1, max(len(header), 1))
+    result = np.full((len(table), len(columns)), EMPTY_LEVEL, dtype=np.int64)
+    for i, name in enumerate(columns):
+        if name in header:
+            result[:, i] = table[:, header.index(name)]
+    return result
+
+
+def _price_row_reader(header):
+    """Build a function turning one CSV price row into (timestamp, bid_prices, bid_volumes, ask_prices, ask_volumes)"""
+    positions = [header.index(name) if name in header else None for name in PRICE_COLUMNS]
+
+    def parse(row):
+        values = [int(row[i]) if i is not None and row[i] else EMPTY_LEVEL for i in positions]
+        levels = values[1:]
+        volumes = [0 if v == EMPTY_LEVEL else v for v in levels[1::2]]
+        half = PRICE_LEVELS
+        return (values[0], tuple(levels[0:2 * half:2]), tuple(volumes[:half]),
+                tuple(levels[2 * half::2]), tuple(volumes[half:]))
+
+    return parse
+
+
+def iter_price_csv(path, start_ts=None, end_ts=None):
+    """Lazily yield (timestamp, bid_prices, bid_volumes, ask_prices, ask_volumes) per CSV row"""
+    rows = _csv_rows(path, start_ts, end_ts)
+    parse = _price_row_reader(next(rows))
+    for row in rows:
+        yield parse(row)
+
+
+def iter_trades_csv(path, start_ts=None, end_ts=None):
+    """Lazily yield (timestamp, price, quantity) per CSV row"""
+    rows = _csv_rows(path, start_ts, end_ts)
+    header = next(rows)
+    positions = [header.index(name) for name in TRADE_COLUMNS]
+    for row in rows:
+        yield tuple(int(row[i]) for i in positions)
+
+
+def iter_price_data(data: PriceData, chunk_size=4096):
+    """Yield the same tuples as iter_price_csv from columnar data, touching one chunk at a time"""
+    for start in range(0, len(data), chunk_size):
+        stop = start + chunk_size
+        yield from zip(data.timestamps[start:stop].tolist(),
+                       map(tuple, data.bid_prices[start:stop].tolist()),
+                       map(tuple, data.bid_volumes[start:stop].tolist()),
+                       map(tuple, data.ask_prices[start:stop].tolist()),
+                       map(tuple, data.ask_volumes[start:stop].tolist()))
+
+
+def iter_trade_data(data: TradeData, chunk_size=4096):
+    """Yield the same tuples as iter_trades_csv from columnar data, touching one chunk at a time"""
+    for start in range(0, len(data), chunk_size):
+        stop = start + chunk_size
+        yield from zip(data.timestamps[start:stop].tolist(),
+                       data.prices[start:stop].tolist(),
+                       data.quantities[start:stop].tolist())
+
+
+def load_price_csv(path, start_ts=None, end_ts=None) -> PriceData:
+    """Parse a `timestamp,bid_price_1,...,ask_volume_3` file into a PriceData"""
+    table = _read_int_table(path, PRICE_COLUMNS, start_ts, end_ts)
+    levels = table[:, 1:].reshape(len(table), 2, PRICE_LEVELS, 2)  # side, level, price/volume
+    volumes = levels[..., 1]
+    volumes[volumes == EMPTY_LEVEL] = 0
+    return PriceData(
+        timestamps=np.ascontiguousarray(table[:, 0]),
+        bid_prices=np.ascontiguousarray(levels[:, 0, :, 0]),
+        bid_volumes=np.ascontiguousarray(levels[:, 0, :, 1]),
+        ask_prices=np.ascontiguousarray(levels[:, 1, :, 0]),
+        ask_volumes=np.ascontiguousarray(levels[:, 1, :, 1]),
+    )
+
+
+def load_trades_csv(path, start_ts=None, end_ts=None) -> TradeData:
+    """Parse a `timestamp,price,quantity` file into a TradeData"""
+    table = _read_int_table(path, TRADE_COLUMNS, start_ts, end_ts)
+    return TradeData(
+        timestamps=np.ascontiguousarray(table[:, 0]),
+        prices=np.ascontiguousarray(table[:, 1]),
+        quantities=np.ascontiguousarray(table[:, 2]),
+    )
+
+
+def content_hash(path, chunk_size=1 << 20):
+    """Hex digest of a file's bytes"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParsedDataCache:
+    """On-disk cache of parsed CSVs stored as uncompressed .npz files
+
+    Entries are keyed by the CSV's absolute path and validated against its size,
+    mtime and content hash. When size and mtime match the hash is not recomputed;
+    when only the mtime changed the hash decides whether the entry is still valid.
+    By default entries live in a CACHE_DIR_NAME folder next to each CSV.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._dirs = set()  # cache directories touched by this instance
+
+    def load_prices(self, path) -> PriceData:
+        return self._load(path, load_price_csv, PriceData)
+
+    def load_trades(self, path) -> TradeData:
+        return self._load(path, load_trades_csv, TradeData)
+
+    def stats(self):
+        """Return cache hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def record(self, path, hit):
+        """Count a lookup, including ones made by a copy of this cache in a worker process"""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._dirs.add(os.path.dirname(self._entry_path(path)))
+
+    def invalidate(self, path=None):
+        """Delete the entry for `path`, or every entry this cache knows about"""
+        if path is not None:
+            entry = self._entry_path(path)
+            if os.path.exists(entry):
+                os.remove(entry)
+            return
+
+        dirs = {self.cache_dir} if self.cache_dir else set(self._dirs)
+        for cache_dir in dirs:
+            if not os.path.isdir(cache_dir):
+                continue
+            for name in os.listdir(cache_dir):
+                if name.endswith(".npz") and not name.endswith(".idx.npz"):
+                    os.remove(os.path.join(cache_dir, name))
+
+    def _entry_path(self, path):
+        return _sidecar_path(path, self.cache_dir, ".npz")
+
+    def _load(self, path, parser, data_cls):
+        entry = self._entry_path(path)
+        stat = os.stat(path)
+        names = [f.name for f in fields(data_cls)]
+
+        if os.path.exists(entry):
+            try:
+                with np.load(entry) as cached:
+                    size = int(cached["__size__"])
+                    mtime_ns = int(cached["__mtime_ns__"])
+                    digest = str(cached["__hash__"])
+                    if size == stat.st_size and (mtime_ns == stat.st_mtime_ns or digest == content_hash(path)):
+                        data = data_cls(**{name: cached[name] for name in names})
+                        if mtime_ns != stat.st_mtime_ns:
+                            self._store(entry, data, names, stat, digest)
+                        self.record(path, hit=True)
+                        return data
+            except (OSError, KeyError, ValueError):
+                pass  # unreadable or stale entry; rebuild it below
+
+        self.record(path, hit=False)
+        data = parser(path)
+        self._store(entry, data, names, stat, content_hash(path))
+        return data
+
+    def _store(self, entry, data, names, stat, digest):
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        arrays = {name: getattr(data, name) for name in names}
+        tmp = entry + ".tmp.npz"
+        np.savez(tmp, __size__=stat.st_size, __mtime_ns__=stat.st_mtime_ns, __hash__=digest, **arrays)
+        os.replace(tmp, entry)
+
+
+class MarketDataStore:
+    """Directory of raw column files that are memory-mapped on open
+
+    Layout is <root>/<product>/<prices|trades>/<field>.bin with a meta.json holding
+    dtypes and shapes. Level fields are stored as one (rows, PRICE_LEVELS) file each
+    so a book row is a single contiguous read. Rows are stored sorted by timestamp,
+    which lets window() find a range by binary search without reading the rest.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def products(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isfile(os.path.join(self.root, name, "prices", STORE_META_FILE)))
+
+    def import_csv(self, product, price_csv, trades_csv):
+        """Parse a product's CSVs and write them into the store"""
+        self.write(product, load_price_csv(price_csv), load_trades_csv(trades_csv))
+
+    def write(self, product, prices: PriceData, trades: TradeData):
+        self._write_table(os.path.join(self.root, product, "prices"), prices)
+        self._write_table(os.path.join(self.root, product, "trades"), trades)
+
+    def open_prices(self, product, start_ts=None, end_ts=None) -> PriceData:
+        prices = PriceData(**self._open_table(os.path.join(self.root, product, "prices")))
+        return prices.window(start_ts, end_ts)
+
+    def open_trades(self, product, start_ts=None, end_ts=None) -> TradeData:
+        trades = TradeData(**self._open_table(os.path.join(self.root, product, "trades")))
+        return trades.window(start_ts, end_ts)
+
+    @staticmethod
+    def _write_table(table_dir, data):
+        os.makedirs(table_dir, exist_ok=True)
+        order = np.argsort(data.timestamps, kind="stable")  # keeps later duplicates last
+        meta = {}
+        for f in fields(data):
+            values = np.ascontiguousarray(getattr(data, f.name)[order])
+            values.tofile(os.path.join(table_dir, f.name + ".bin"))
+            meta[f.name] = {"dtype": values.dtype.str, "shape": list(values.shape)}
+        with open(os.path.join(table_dir, STORE_META_FILE), "w") as f:
+            json.dump(meta, f)
+
+    @staticmethod
+    def _open_table(table_dir):
+        with open(os.path.join(table_dir, STORE_META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {}
+        for name, info in meta.items():
+            shape = tuple(info["shape"])
+            if shape[0] == 0:
+                arrays[name] = np.empty(shape, dtype=info["dtype"])  # mmap cannot map empty files
+            else:
+                arrays[name] = np.memmap(os.path.join(table_dir, name + ".bin"),
+                                         dtype=info["dtype"], mode="r", shape=shape)
+        return arrays
+
+
+@dataclass
+class IngestProgress:
+    """Throughput report for one ingested file"""
+    product: str
+    kind: str  # "prices" or "trades"
+    path: str
+    rows: int
+    bytes: int
+    seconds: float
+
+    @property
+    def rows_per_s(self):
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+    @property
+    def mb_per_s(self):
+        return self.bytes / 1e6 / self.seconds if self.seconds > 0 else float("inf")
+
+
+def ingest_file(product, kind, path, cache: ParsedDataCache = None, start_ts=None, end_ts=None):
+    """
+    Parse one CSV, optionally through a cache; safe to run in a worker process
+
+    A cached file is stored whole and windowed after loading; otherwise only the
+    [start_ts, end_ts] window is parsed. Either way a window needs a file sorted by
+    timestamp and raises ValueError otherwise. Returns (data, IngestProgress,
+    cache_hit) where cache_hit is None without a cache.
+    """
+    start = time.perf_counter()
+    hit = None
+    if cache is not None:
+        hits = cache.hits
+        data = cache.load_prices(path) if kind == "prices" else cache.load_trades(path)
+        if (start_ts is not None or end_ts is not None) and not _is_sorted(data.timestamps):
+            raise ValueError(f"{path} is not sorted by timestamp")
+        data = data.window(start_ts, end_ts)
+        hit = cache.hits > hits
+    else:
+        loader = load_price_csv if kind == "prices" else load_trades_csv
+        data = loader(path, start_ts, end_ts)
+    seconds = time.perf_counter() - start
+    progress = IngestProgress(product, kind, path, len(data), os.path.getsize(path), seconds)
+    return data, progress, hit